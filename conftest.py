@@ -0,0 +1,11 @@
+# conftest.py
+# -*- coding: utf-8 -*-
+"""
+pytest 全局配置
+"""
+import logging
+
+
+def pytest_configure(config):
+    """整个测试会话只配置一次日志，替代各测试模块导入时重复调用 basicConfig"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
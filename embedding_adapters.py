@@ -38,7 +38,8 @@ class OpenAIEmbeddingAdapter(BaseEmbeddingAdapter):
         self._embedding = OpenAIEmbeddings(
             openai_api_key=api_key,
             openai_api_base=ensure_openai_base_url_has_v1(base_url),
-            model=model_name
+            model=model_name,
+            **proxy_manager.get_openai_client_kwargs()
         )
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
@@ -66,6 +67,7 @@ class AzureOpenAIEmbeddingAdapter(BaseEmbeddingAdapter):
             azure_deployment=self.azure_deployment,
             openai_api_key=api_key,
             api_version=self.api_version,
+            **proxy_manager.get_openai_client_kwargs()
         )
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
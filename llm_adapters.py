@@ -45,7 +45,7 @@ class DeepSeekAdapter(BaseLLMAdapter):
     """
     适配官方/OpenAI兼容接口（使用 langchain.ChatOpenAI）
     """
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -63,7 +63,8 @@ class DeepSeekAdapter(BaseLLMAdapter):
             base_url=self.base_url,
             max_tokens=self.max_tokens,
             temperature=self.temperature,
-            timeout=self.timeout
+            timeout=self.timeout,
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
 
     def invoke(self, prompt: str) -> str:
@@ -77,7 +78,7 @@ class OpenAIAdapter(BaseLLMAdapter):
     """
     适配官方/OpenAI兼容接口（使用 langchain.ChatOpenAI）
     """
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -89,13 +90,15 @@ class OpenAIAdapter(BaseLLMAdapter):
         if proxy_manager.enabled:
             proxy_manager._apply_proxy_settings()
 
+        # 使用代理管理器提供的httpx客户端（支持时为HTTP/2，多个并发请求复用同一连接）
         self._client = ChatOpenAI(
             model=self.model_name,
             api_key=self.api_key,
             base_url=self.base_url,
             max_tokens=self.max_tokens,
             temperature=self.temperature,
-            timeout=self.timeout
+            timeout=self.timeout,
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
 
     def invoke(self, prompt: str) -> str:
@@ -179,7 +182,7 @@ class OllamaAdapter(BaseLLMAdapter):
     """
     Ollama 同样有一个 OpenAI-like /v1/chat 接口，可直接使用 ChatOpenAI。
     """
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -196,7 +199,8 @@ class OllamaAdapter(BaseLLMAdapter):
             base_url=self.base_url,
             max_tokens=self.max_tokens,
             temperature=self.temperature,
-            timeout=self.timeout
+            timeout=self.timeout,
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
 
     def invoke(self, prompt: str) -> str:
@@ -207,7 +211,7 @@ class OllamaAdapter(BaseLLMAdapter):
         return response.content
 
 class MLStudioAdapter(BaseLLMAdapter):
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -221,7 +225,8 @@ class MLStudioAdapter(BaseLLMAdapter):
             base_url=self.base_url,
             max_tokens=self.max_tokens,
             temperature=self.temperature,
-            timeout=self.timeout
+            timeout=self.timeout,
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
 
     def invoke(self, prompt: str) -> str:
@@ -287,7 +292,7 @@ class AzureAIAdapter(BaseLLMAdapter):
 
 # 火山引擎实现
 class VolcanoEngineAIAdapter(BaseLLMAdapter):
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -298,7 +303,8 @@ class VolcanoEngineAIAdapter(BaseLLMAdapter):
         self._client = OpenAI(
             base_url=base_url,
             api_key=api_key,
-            timeout=timeout  # 添加超时配置
+            timeout=timeout,  # 添加超时配置
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
     def invoke(self, prompt: str) -> str:
         try:
@@ -319,7 +325,7 @@ class VolcanoEngineAIAdapter(BaseLLMAdapter):
             return ""
 
 class SiliconFlowAdapter(BaseLLMAdapter):
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -330,7 +336,8 @@ class SiliconFlowAdapter(BaseLLMAdapter):
         self._client = OpenAI(
             base_url=base_url,
             api_key=api_key,
-            timeout=timeout  # 添加超时配置
+            timeout=timeout,  # 添加超时配置
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
     def invoke(self, prompt: str) -> str:
         try:
@@ -354,7 +361,7 @@ class GrokAdapter(BaseLLMAdapter):
     """
     适配 xAI Grok API
     """
-    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600):
+    def __init__(self, api_key: str, base_url: str, model_name: str, max_tokens: int, temperature: float = 0.7, timeout: Optional[int] = 600, max_concurrent: Optional[int] = None):
         self.base_url = check_base_url(base_url)
         self.api_key = api_key
         self.model_name = model_name
@@ -365,7 +372,8 @@ class GrokAdapter(BaseLLMAdapter):
         self._client = OpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
-            timeout=self.timeout
+            timeout=self.timeout,
+            **proxy_manager.get_openai_client_kwargs(max_concurrent)
         )
 
     def invoke(self, prompt: str) -> str:
@@ -396,33 +404,35 @@ def create_llm_adapter(
     api_key: str,
     temperature: float,
     max_tokens: int,
-    timeout: int
+    timeout: int,
+    max_concurrent: Optional[int] = None
 ) -> BaseLLMAdapter:
     """
     工厂函数：根据 interface_format 返回不同的适配器实例。
+    max_concurrent 为调用方的最大并发请求数，OpenAI兼容的适配器据此扩容共享连接池。
     """
     fmt = interface_format.strip().lower()
     if fmt == "deepseek":
-        return DeepSeekAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return DeepSeekAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "openai":
-        return OpenAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return OpenAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "azure openai":
         return AzureOpenAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
     elif fmt == "azure ai":
         return AzureAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
     elif fmt == "ollama":
-        return OllamaAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return OllamaAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "ml studio":
-        return MLStudioAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return MLStudioAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "gemini":
         return GeminiAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
     elif fmt == "阿里云百炼":
-        return OpenAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return OpenAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "火山引擎":
-        return VolcanoEngineAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return VolcanoEngineAIAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "硅基流动":
-        return SiliconFlowAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return SiliconFlowAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     elif fmt == "grok":
-        return GrokAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout)
+        return GrokAdapter(api_key, base_url, model_name, max_tokens, temperature, timeout, max_concurrent)
     else:
         raise ValueError(f"Unknown interface_format: {interface_format}")
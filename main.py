@@ -20,7 +20,11 @@ def main():
 
     app = ctk.CTk()
     gui = NovelGeneratorGUI(app)
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        # 程序退出时释放共享的HTTP连接池
+        proxy_manager.close_http_client()
 
 if __name__ == "__main__":
     main()
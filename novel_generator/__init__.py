@@ -9,8 +9,8 @@ from .chapter import (
     generate_chapter_draft
 )
 from .finalization import finalize_chapter, enrich_chapter_text
-from .knowledge import import_knowledge_file
-from .knowledge_parser import KnowledgeParser, parse_knowledge_from_file
+from .knowledge import import_knowledge_file, import_knowledge_files_batch, max_chunk_overlap
+from .knowledge_parser import KnowledgeParser, ParsingCancelledError, parse_knowledge_from_file
 from .knowledge_structures import (
     WorldView, Character, PlotOutline, StructuredKnowledge,
     WorldViewElement, CharacterAbility, CharacterRelationship,
@@ -1,12 +1,16 @@
 #novel_generator/knowledge.py
 # -*- coding: utf-8 -*-
 """
-知识文件导入至向量库（advanced_split_content、import_knowledge_file）
+知识文件导入至向量库（advanced_split_content、import_knowledge_file、import_knowledge_files_batch）
 """
 import os
+import json
+import asyncio
+import hashlib
 import logging
 import re
 import traceback
+import uuid
 import jieba
 import jieba.posseg as pseg
 
@@ -14,14 +18,53 @@ import jieba.posseg as pseg
 jieba.setLogLevel(20)  # 设置为INFO级别，避免DEBUG信息
 import warnings
 from utils import read_file
-from novel_generator.vectorstore_utils import load_vector_store, init_vector_store
+from novel_generator.vectorstore_utils import load_vector_store, init_vector_store, get_vectorstore_dir
 from langchain.docstore.document import Document
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # 禁用特定的Torch警告
 warnings.filterwarnings('ignore', message='.*Torch was not compiled with flash attention.*')
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-def advanced_split_content(content: str, similarity_threshold: float = 0.7, max_length: int = 500) -> list:
+# 已导入文件的哈希与文档ID缓存，放在向量库目录内，清空向量库时一并失效
+IMPORT_CACHE_FILENAME = ".knowledge_cache.json"
+
+def _file_digest(file_path: str) -> str:
+    """计算文件内容的哈希（xxhash可用时使用xxh3_128，否则使用blake2b）"""
+    hasher = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _load_import_cache(filepath: str) -> dict:
+    """读取已导入文件的哈希与文档ID缓存，不存在或损坏时返回空字典"""
+    cache_path = os.path.join(get_vectorstore_dir(filepath), IMPORT_CACHE_FILENAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_import_cache(filepath: str, cache: dict):
+    """保存已导入文件的哈希与文档ID缓存"""
+    cache_path = os.path.join(get_vectorstore_dir(filepath), IMPORT_CACHE_FILENAME)
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logging.warning(f"保存知识库导入缓存失败: {e}")
+
+def max_chunk_overlap(max_length: int) -> int:
+    """段落重叠字符数的上限：不超过段落长度的一半，否则新段落几乎无法推进"""
+    return max(0, max_length // 2)
+
+def advanced_split_content(content: str, similarity_threshold: float = 0.7, max_length: int = 500,
+                           overlap: int = 0) -> list:
     """
     使用jieba分词的分段策略将文本切分为适合向量存储的段落片段。
     
@@ -39,6 +82,8 @@ def advanced_split_content(content: str, similarity_threshold: float = 0.7, max_
         content (str): 需要分割的原始文本内容
         similarity_threshold (float, optional): 相似度阈值，当前未使用，保留用于未来扩展. Defaults to 0.7.
         max_length (int, optional): 每个段落的最大字符长度. Defaults to 500.
+        overlap (int, optional): 相邻段落重叠的最大字符数（按完整词语计），超过max_chunk_overlap(max_length)
+            时按上限处理. Defaults to 0.
         
     Returns:
         list: 包含分割后文本段落的列表，每个段落都是完整词语的组合
@@ -52,6 +97,13 @@ def advanced_split_content(content: str, similarity_threshold: float = 0.7, max_
     if not words:
         return []
 
+    # 重叠部分不能占满整个段落，否则新段落无法推进
+    overlap_limit = max_chunk_overlap(max_length)
+    if overlap > overlap_limit:
+        logging.warning(f"段落重叠长度 {overlap} 超过上限 {overlap_limit}（段落长度的一半），已按 {overlap_limit} 处理")
+        overlap = overlap_limit
+    overlap = max(0, overlap)
+    
     # 存储最终分割结果的列表
     final_segments = []
     
@@ -70,9 +122,20 @@ def advanced_split_content(content: str, similarity_threshold: float = 0.7, max_
             if current_segment:
                 final_segments.append(''.join(current_segment))
             
-            # 开始新的段落，包含当前词语
-            current_segment = [word]
-            current_length = word_length
+            # 从上一段末尾取不超过overlap个字符的完整词语作为重叠部分
+            overlap_words = []
+            overlap_length = 0
+            if overlap:
+                for prev_word in reversed(current_segment):
+                    if overlap_length + len(prev_word) > overlap:
+                        break
+                    overlap_words.append(prev_word)
+                    overlap_length += len(prev_word)
+                overlap_words.reverse()
+            
+            # 开始新的段落，包含重叠部分与当前词语
+            current_segment = overlap_words + [word]
+            current_length = overlap_length + word_length
         else:
             # 将词语添加到当前段落
             current_segment.append(word)
@@ -90,7 +153,9 @@ def import_knowledge_file(
     embedding_interface_format: str,
     embedding_model_name: str,
     file_path: str,
-    filepath: str
+    filepath: str,
+    chunk_size: int = 500,
+    chunk_overlap: int = 0
 ):
     """
     将用户指定的知识库文件导入到向量数据库中，以便在生成章节时进行语义检索。
@@ -109,6 +174,8 @@ def import_knowledge_file(
         embedding_model_name (str): 嵌入模型名称
         file_path (str): 待导入的知识库文件路径
         filepath (str): 项目保存路径，用于确定向量数据库存储位置
+        chunk_size (int, optional): 每个段落的最大字符长度. Defaults to 500.
+        chunk_overlap (int, optional): 相邻段落重叠的字符数. Defaults to 0.
         
     Returns:
         None: 无返回值，结果通过日志输出和文件存储体现
@@ -130,7 +197,7 @@ def import_knowledge_file(
         return
     
     # 对文件内容进行分段处理，将大段文本切分为适合向量化的较小段落
-    paragraphs = advanced_split_content(content)
+    paragraphs = advanced_split_content(content, max_length=chunk_size, overlap=chunk_overlap)
     
     # 导入嵌入适配器模块并创建指定类型的嵌入适配器实例
     from embedding_adapters import create_embedding_adapter
@@ -168,3 +235,183 @@ def import_knowledge_file(
             # 如果添加文档过程中出现异常，记录警告日志和异常信息
             logging.warning(f"知识库导入失败: {e}")
             traceback.print_exc()
+
+async def _add_batches_concurrently(store, batches: list, max_concurrency: int) -> list:
+    """
+    并发地将多批段落写入向量库，按批次顺序返回各批成功写入的段落数量（失败的批次为0）。
+    
+    batches 中每一项为 (段落列表, 文档ID列表)。嵌入适配器均为同步接口（各家SDK/HTTP实现不一），
+    因此每批在线程中执行 store.add_texts，由信号量限制同时在途的嵌入请求数。
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _add_batch(texts, ids):
+        async with semaphore:
+            try:
+                await asyncio.to_thread(store.add_texts, texts, ids=ids)
+                return len(texts)
+            except Exception as e:
+                logging.warning(f"知识库批次导入失败: {e}")
+                traceback.print_exc()
+                return 0
+
+    return await asyncio.gather(*(_add_batch(texts, ids) for texts, ids in batches))
+
+def import_knowledge_files_batch(
+    embedding_api_key: str,
+    embedding_url: str,
+    embedding_interface_format: str,
+    embedding_model_name: str,
+    file_paths: list,
+    filepath: str,
+    batch_size: int = 100,
+    max_concurrency: int = 4,
+    chunk_size: int = 500,
+    chunk_overlap: int = 0
+) -> int:
+    """
+    批量将多个知识库文件导入向量数据库。
+    
+    与 import_knowledge_file 逐文件处理不同，这里先读取并切分所有文件，
+    再按 batch_size 个段落一组写入向量库，每次网络往返携带一整批段落，
+    嵌入适配器与向量库也只创建/加载一次。各批次通过 asyncio 并发提交，
+    同时在途的请求数由 max_concurrency 限制。
+    
+    已成功导入且内容未变化的文件（按内容哈希判断）会被跳过，不再重复嵌入；
+    内容变化或上次未完整导入的文件，会先删除其上次写入的段落再重新导入。
+    
+    Args:
+        embedding_api_key (str): 嵌入模型服务的API密钥
+        embedding_url (str): 嵌入模型服务的基础URL地址
+        embedding_interface_format (str): 嵌入模型接口格式（如OpenAI、Ollama等）
+        embedding_model_name (str): 嵌入模型名称
+        file_paths (list): 待导入的知识库文件路径列表
+        filepath (str): 项目保存路径，用于确定向量数据库存储位置
+        batch_size (int, optional): 每批写入的段落数量. Defaults to 100.
+        max_concurrency (int, optional): 同时进行的嵌入请求数量. Defaults to 4.
+        chunk_size (int, optional): 每个段落的最大字符长度. Defaults to 500.
+        chunk_overlap (int, optional): 相邻段落重叠的字符数，超过max_chunk_overlap(chunk_size)时按上限处理. Defaults to 0.
+        
+    Returns:
+        int: 成功写入向量库的段落数量
+    """
+    logging.info(f"开始批量导入知识库文件: {len(file_paths)} 个, 接口格式: {embedding_interface_format}, 模型: {embedding_model_name}")
+    batch_size = max(1, int(batch_size))
+    max_concurrency = max(1, int(max_concurrency))
+    # 缓存中记录实际生效的重叠长度
+    overlap_limit = max_chunk_overlap(chunk_size)
+    if chunk_overlap > overlap_limit:
+        logging.warning(f"段落重叠长度 {chunk_overlap} 超过上限 {overlap_limit}（段落长度的一半），已按 {overlap_limit} 处理")
+    chunk_overlap = max(0, min(chunk_overlap, overlap_limit))
+    
+    import_cache = _load_import_cache(filepath)
+    
+    # 先读取并切分全部文件，跨文件汇总段落；owners[i]为第i个段落所属文件的缓存键，ids[i]为其文档ID
+    paragraphs = []
+    owners = []
+    ids = []
+    new_entries = {}
+    # 需要重新导入（或已清空内容）的文件上次写入的文档ID，写入新段落前先删除，避免残留旧段落或重复段落
+    stale_ids = []
+    changed_keys = set()
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            logging.warning(f"知识库文件不存在: {file_path}")
+            continue
+        
+        cache_key = os.path.abspath(file_path)
+        digest = _file_digest(file_path)
+        cached = import_cache.get(cache_key)
+        # 内容与分段参数均未变化时才视为已导入
+        if (cached and cached.get("hash") == digest
+                and cached.get("chunk_size") == chunk_size
+                and cached.get("chunk_overlap") == chunk_overlap):
+            logging.info(f"知识库文件未修改，已有 {cached.get('chunks', 0)} 个段落在向量库中，跳过: {file_path}")
+            continue
+        if cached:
+            stale_ids.extend(cached.get("ids", []))
+            changed_keys.add(cache_key)
+        
+        content = read_file(file_path)
+        if not content.strip():
+            logging.warning(f"知识库文件内容为空: {file_path}")
+            continue
+        file_paragraphs = [str(p) for p in advanced_split_content(content, max_length=chunk_size, overlap=chunk_overlap)]
+        file_ids = [uuid.uuid4().hex for _ in file_paragraphs]
+        paragraphs.extend(file_paragraphs)
+        owners.extend([cache_key] * len(file_paragraphs))
+        ids.extend(file_ids)
+        new_entries[cache_key] = {
+            "hash": digest,
+            "chunks": len(file_paragraphs),
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "ids": file_ids
+        }
+    
+    if not paragraphs and not stale_ids:
+        logging.warning("没有需要导入的知识库内容。")
+        return 0
+    
+    from embedding_adapters import create_embedding_adapter
+    embedding_adapter = create_embedding_adapter(
+        embedding_interface_format,
+        embedding_api_key,
+        embedding_url if embedding_url else "http://localhost:11434/api",
+        embedding_model_name
+    )
+    
+    starts = list(range(0, len(paragraphs), batch_size))
+    batches = [(paragraphs[i:i + batch_size], ids[i:i + batch_size]) for i in starts]
+    results = []
+    
+    store = load_vector_store(embedding_adapter, filepath)
+    if store and stale_ids:
+        try:
+            store.delete(ids=stale_ids)
+            logging.info(f"已删除 {len(stale_ids)} 个需要重新导入的旧段落。")
+        except Exception as e:
+            logging.warning(f"删除旧段落失败，向量库中可能残留重复内容: {e}")
+        # 旧段落已删除，先移除对应缓存项，之后按本次的导入结果重新记录
+        for key in changed_keys:
+            import_cache.pop(key, None)
+        _save_import_cache(filepath, import_cache)
+    
+    if not paragraphs:
+        return 0
+    
+    if not store:
+        # 向量库不存在时用第一批段落初始化，其余批次走追加模式
+        logging.info("Vector store does not exist or load failed. Initializing a new one for knowledge import...")
+        store = init_vector_store(embedding_adapter, batches[0][0], filepath, ids=batches[0][1])
+        if not store:
+            logging.warning("知识库导入失败，跳过。")
+            return 0
+        results.append(len(batches[0][0]))
+    
+    if len(batches) > len(results):
+        results.extend(asyncio.run(_add_batches_concurrently(store, batches[len(results):], max_concurrency)))
+    
+    imported = sum(results)
+    logging.info(f"知识库批量导入完成：共 {imported}/{len(paragraphs)} 个段落。")
+    
+    # 按文件记录哈希与文档ID：只要有一批失败，涉及的文件下次仍会重新导入（不记录哈希），
+    # 并先删除本次已成功写入的段落；其余完整导入的文件不受影响
+    written = {key: [] for key in new_entries}
+    failed_files = set()
+    for start, (texts, batch_ids), count in zip(starts, batches, results):
+        if count == len(texts):
+            for key, doc_id in zip(owners[start:start + len(texts)], batch_ids):
+                written[key].append(doc_id)
+        else:
+            failed_files.update(owners[start:start + len(texts)])
+    for key, entry in new_entries.items():
+        if key in failed_files:
+            if written[key]:
+                import_cache[key] = {"ids": written[key]}
+        else:
+            import_cache[key] = entry
+    if failed_files:
+        logging.warning(f"{len(failed_files)} 个知识库文件未完整导入，下次导入时将重新处理。")
+    _save_import_cache(filepath, import_cache)
+    return imported
@@ -7,6 +7,7 @@
 import os
 import json
 import logging
+import threading
 import traceback
 import asyncio
 import concurrent.futures
@@ -24,12 +25,19 @@ from utils import read_file, save_string_to_txt
 jieba.setLogLevel(20)
 
 
+class ParsingCancelledError(Exception):
+    """知识库解析被用户取消"""
+
+
 class KnowledgeParser:
     """
     知识库解析器核心类
     负责从知识库文档中智能提取结构化的小说要素
     """
     
+    # 取消事件默认为空（未经__init__构造的实例同样可用）
+    cancel_event: Optional[threading.Event] = None
+    
     def __init__(self, 
                  llm_interface_format: str,
                  llm_api_key: str,
@@ -40,7 +48,8 @@ class KnowledgeParser:
                  temperature: float = 0.7,
                  max_tokens: int = 4096,
                  timeout: int = 600,
-                 max_concurrent_requests: int = 200):
+                 max_concurrent_requests: int = 200,
+                 cancel_event: Optional[threading.Event] = None):
         """
         初始化知识解析器
         
@@ -55,6 +64,7 @@ class KnowledgeParser:
             max_tokens: 最大令牌数
             timeout: 超时时间
             max_concurrent_requests: 最大并发请求数（默认5）
+            cancel_event: 取消事件，被设置后解析会在段落/合并边界处中止
         """
         self.llm_adapter = create_llm_adapter(
             interface_format=llm_interface_format,
@@ -63,17 +73,28 @@ class KnowledgeParser:
             api_key=llm_api_key,
             temperature=temperature,
             max_tokens=max_tokens,
-            timeout=timeout
+            timeout=timeout,
+            max_concurrent=max_concurrent_requests
         )
         self.embedding_adapter = embedding_adapter
         self.filepath = filepath
         self.vector_store = None
         self.max_concurrent_requests = max_concurrent_requests
+        self.cancel_event = cancel_event
         
         # 如果提供了embedding适配器，尝试加载向量存储
         if self.embedding_adapter and self.filepath:
             self.vector_store = load_vector_store(self.embedding_adapter, self.filepath)
     
+    def is_cancelled(self) -> bool:
+        """是否已请求取消解析"""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def check_cancelled(self):
+        """已请求取消时抛出ParsingCancelledError"""
+        if self.is_cancelled():
+            raise ParsingCancelledError("知识库解析已取消")
+    
     def preprocess_text(self, content: str) -> str:
         """
         预处理输入文本，清理和标准化格式
@@ -203,6 +224,7 @@ class KnowledgeParser:
             
             # 将结果分组，每组4个
             for i in range(0, len(current_results), group_size):
+                self.check_cancelled()
                 group = current_results[i:i + group_size]
                 
                 # 使用AI合并当前组的结果
@@ -354,11 +376,14 @@ class KnowledgeParser:
                     result = self._merge_character_lists(result, item)
             return result
         else:
+            dict_items = [item for item in group if isinstance(item, dict)]
+            if merge_func == self._merge_worldview_data:
+                # 内置合并逻辑一次性累加整组结果，避免逐对合并时反复复制字典、拼接字符串
+                return self._accumulate_worldview_data(dict_items)
             # 世界观和剧情使用通用合并逻辑
             result = {}
-            for item in group:
-                if isinstance(item, dict):
-                    result = merge_func(result, item)
+            for item in dict_items:
+                result = merge_func(result, item)
             return result
     
     def _smart_truncate_with_jieba(self, content: str, max_length: int) -> str:
@@ -456,6 +481,10 @@ class KnowledgeParser:
             segment_text = segment_data.get("text", "")
             segment_id = segment_data.get("segment_id", "")
             
+            # 已取消时跳过尚未开始的段落，不再发起LLM调用
+            if self.is_cancelled():
+                return None
+            
             logging.info(f"并发处理 - 开始处理{extraction_type}段落 {segment_order} (ID: {segment_id})")
             
             try:
@@ -571,6 +600,11 @@ class KnowledgeParser:
             # 收集结果，保持原始顺序
             results_dict = {}
             for future in as_completed(future_to_segment):
+                if self.is_cancelled():
+                    # 取消尚未开始的任务，已在执行的LLM调用结束后即退出
+                    for pending in future_to_segment:
+                        pending.cancel()
+                    raise ParsingCancelledError("知识库解析已取消")
                 segment = future_to_segment[future]
                 segment_order = segment.get("order", 0)
                 try:
@@ -860,26 +894,51 @@ class KnowledgeParser:
         if not new_data:
             return base_data
         
-        merged = base_data.copy()
+        return self._accumulate_worldview_data([base_data, new_data])
+    
+    def _accumulate_worldview_data(self, data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        单次遍历合并多份世界观/剧情数据，所有输入共用一个累加字典
         
-        # 合并不同类型的字段
-        for key, value in new_data.items():
-            if key not in merged:
-                merged[key] = value
-            elif isinstance(value, list) and isinstance(merged[key], list):
-                # 合并列表，去重
-                existing_items = {str(item) for item in merged[key]}
-                for item in value:
-                    if str(item) not in existing_items:
-                        merged[key].append(item)
-                        existing_items.add(str(item))
-            elif isinstance(value, dict) and isinstance(merged[key], dict):
-                # 递归合并字典
-                merged[key] = self._merge_dict_data(merged[key], value)
-            elif isinstance(value, str) and isinstance(merged[key], str):
-                # 合并字符串，避免重复
-                if value not in merged[key]:
-                    merged[key] += "\n" + value
+        Args:
+            data_list: 待合并的数据列表（不会被修改）
+            
+        Returns:
+            Dict: 合并后的数据
+        """
+        merged = {}
+        seen_items = {}  # 列表字段 -> 已有元素的字符串形式，用于去重
+        text_parts = {}  # 字符串字段 -> 片段列表，最后统一拼接
+        
+        for data in data_list:
+            # 合并不同类型的字段
+            for key, value in data.items():
+                if key not in merged:
+                    if isinstance(value, str):
+                        merged[key] = None  # 占位以保持字段顺序
+                        text_parts[key] = [value]
+                    elif isinstance(value, list):
+                        merged[key] = list(value)
+                        seen_items[key] = {str(item) for item in value}
+                    else:
+                        merged[key] = value
+                elif key in text_parts:
+                    # 合并字符串，避免重复
+                    if isinstance(value, str) and not any(value in part for part in text_parts[key]):
+                        text_parts[key].append(value)
+                elif isinstance(value, list) and isinstance(merged[key], list):
+                    # 合并列表，去重
+                    existing_items = seen_items[key]
+                    for item in value:
+                        if str(item) not in existing_items:
+                            merged[key].append(item)
+                            existing_items.add(str(item))
+                elif isinstance(value, dict) and isinstance(merged[key], dict):
+                    # 递归合并字典
+                    merged[key] = self._merge_dict_data(merged[key], value)
+        
+        for key, parts in text_parts.items():
+            merged[key] = "\n".join(parts)
         
         return merged
     
@@ -916,18 +975,23 @@ class KnowledgeParser:
         
         merged = base_list.copy()
         existing_names = {char.get("name", "") for char in base_list}
+        # 角色名 -> 在merged中首次出现的位置，重名角色直接定位，无需逐个扫描
+        # 缺少name字段的角色以None为键，不会与名称为空字符串的角色混淆
+        name_index = {}
+        for i, char in enumerate(merged):
+            name_index.setdefault(char.get("name"), i)
         
         for new_char in new_list:
             char_name = new_char.get("name", "")
             if char_name and char_name not in existing_names:
+                name_index.setdefault(char_name, len(merged))
                 merged.append(new_char)
                 existing_names.add(char_name)
             elif char_name in existing_names:
                 # 如果角色已存在，合并其信息
-                for i, existing_char in enumerate(merged):
-                    if existing_char.get("name") == char_name:
-                        merged[i] = self._merge_dict_data(existing_char, new_char)
-                        break
+                index = name_index.get(char_name)
+                if index is not None:
+                    merged[index] = self._merge_dict_data(merged[index], new_char)
         
         return merged
 
@@ -939,7 +1003,8 @@ def parse_knowledge_from_file(
     llm_base_url: str,
     llm_model: str,
     filepath: str,
-    embedding_adapter=None
+    embedding_adapter=None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Optional[Dict[str, Any]]:
     """
     从文件中解析知识库的便捷函数
@@ -950,6 +1015,9 @@ def parse_knowledge_from_file(
         
     Returns:
         Optional[Dict]: 结构化知识数据，失败返回None
+        
+    Raises:
+        ParsingCancelledError: cancel_event被设置，解析中途取消
     """
     try:
         # 读取文件内容
@@ -965,7 +1033,8 @@ def parse_knowledge_from_file(
             llm_base_url=llm_base_url,
             llm_model=llm_model,
             embedding_adapter=embedding_adapter,
-            filepath=filepath
+            filepath=filepath,
+            cancel_event=cancel_event
         )
         
         # 提取各要素 - 使用并发处理
@@ -1001,6 +1070,8 @@ def parse_knowledge_from_file(
                 
                 logging.info("并发要素提取完成")
         
+        except ParsingCancelledError:
+            raise
         except Exception as e:
             logging.error(f"并发要素提取失败，回退到串行处理: {e}")
             # 如果并发失败，回退到原来的串行处理
@@ -1009,6 +1080,7 @@ def parse_knowledge_from_file(
             plot_outline = parser.extract_plot_outline(content)
         
         # 关系分析依赖角色数据，单独处理
+        parser.check_cancelled()
         relationships = parser.analyze_relationships(characters)
         
         # 生成结构化数据
@@ -1025,11 +1097,13 @@ def parse_knowledge_from_file(
         structured_data["metadata"]["extracted_time"] = ""  # 可以添加时间戳
         
         # 保存结果
+        parser.check_cancelled()
         parser.save_extracted_knowledge(structured_data)
         
         logging.info("知识库解析完成")
         
         # 生成AI书评（如果解析成功）
+        parser.check_cancelled()
         try:
             from novel_generator.review_generator import generate_book_review
             logging.info("开始生成AI书评...")
@@ -1056,6 +1130,9 @@ def parse_knowledge_from_file(
         
         return structured_data
         
+    except ParsingCancelledError:
+        logging.info("知识库解析已取消")
+        raise
     except Exception as e:
         logging.error(f"知识库解析失败: {e}")
         traceback.print_exc()
@@ -47,9 +47,9 @@ def clear_vector_store(filepath: str) -> bool:
         traceback.print_exc()
         return False
 
-def init_vector_store(embedding_adapter, texts, filepath: str):
+def init_vector_store(embedding_adapter, texts, filepath: str, ids=None):
     """
-    在 filepath 下创建/加载一个 Chroma 向量库并插入 texts。
+    在 filepath 下创建/加载一个 Chroma 向量库并插入 texts（ids 为可选的文档ID列表）。
     如果Embedding失败，则返回 None，不中断任务。
     """
     from langchain.embeddings.base import Embeddings as LCEmbeddings
@@ -80,6 +80,7 @@ def init_vector_store(embedding_adapter, texts, filepath: str):
         vectorstore = Chroma.from_documents(
             documents,
             embedding=chroma_embedding,
+            ids=ids,
             persist_directory=store_dir,
             client_settings=Settings(anonymized_telemetry=False),
             collection_name="novel_collection"
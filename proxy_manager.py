@@ -6,29 +6,38 @@ HTTP(S) 代理管理器
 """
 import os
 import logging
+import importlib.util
+import threading
+import httpx
 import requests
 from typing import Optional, Dict, Any
-from urllib.parse import urlparse
+from urllib.parse import urlparse, ParseResult
+
+# HTTP/2 需要可选依赖 h2（pip install httpx[http2]），未安装时回退到 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 共享连接池的默认大小，与openai SDK的默认值一致
+DEFAULT_MAX_CONNECTIONS = 1000
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 100
 
 
 class ProxyManager:
-    """HTTP(S) 代理管理器"""
-    
-    _instance = None
-    _initialized = False
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ProxyManager, cls).__new__(cls)
-        return cls._instance
+    """HTTP(S) 代理管理器，全局共享实例见模块级 proxy_manager"""
     
     def __init__(self):
-        if not self._initialized:
-            self.http_proxy = "http://127.0.0.1:10808",
-            self.https_proxy = "https://127.0.0.1:10808",
-            self.no_proxy = None
-            self.enabled = False
-            self._initialized = True
+        self.http_proxy = "http://127.0.0.1:10808"
+        self.https_proxy = "https://127.0.0.1:10808"
+        self.no_proxy = None
+        self.enabled = False
+        self._status_cache = None  # get_status()结果缓存，代理设置变化时失效
+        self._last_key = None  # 上一次configure()的参数，用于跳过重复配置
+        self._http_parsed = None  # 解析后的代理地址，configure()时计算一次
+        self._https_parsed = None
+        self._http_client = None  # 共享的httpx客户端，代理设置变化时重建
+        self._http_client_key = None
+        self._http_client_size = 0
+        self._retired_clients = []  # 被替换的旧客户端，已创建的适配器可能仍在使用，退出时统一关闭
+        self._http_client_lock = threading.Lock()
     
     def configure(self, http_proxy: str = None, https_proxy: str = None, 
                   no_proxy: str = None, enabled: bool = False):
@@ -41,22 +50,52 @@ class ProxyManager:
             no_proxy: 不使用代理的域名列表，用逗号分隔
             enabled: 是否启用代理
         """
+        key = (http_proxy, https_proxy or http_proxy, no_proxy, enabled)
+        if key == self._last_key:
+            return
+        self._last_key = key
+        
         self.http_proxy = http_proxy
         self.https_proxy = https_proxy or http_proxy  # 如果没有指定HTTPS代理，使用HTTP代理
         self.no_proxy = no_proxy
         self.enabled = enabled
+        self._status_cache = None
+        self._http_parsed = self._parse_proxy_url(self.http_proxy)
+        self._https_parsed = self._parse_proxy_url(self.https_proxy)
         
         if enabled:
             self._apply_proxy_settings()
-            logging.info(f"代理已启用 - HTTP: {self.http_proxy}, HTTPS: {self.https_proxy}")
+            logging.info("代理已启用 - HTTP: %s, HTTPS: %s", self.http_proxy, self.https_proxy)
         else:
             self._clear_proxy_settings()
             logging.info("代理已禁用")
     
+    @staticmethod
+    def _parse_proxy_url(url: Optional[str]) -> Optional[ParseResult]:
+        """解析并校验代理地址，无效时记录警告并返回None"""
+        if not url:
+            return None
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.hostname:
+            logging.warning("代理地址格式无效: %s", url)
+            return None
+        return parsed
+    
+    def get_parsed(self) -> Dict[str, Optional[ParseResult]]:
+        """
+        获取configure()时预先解析好的代理地址，供需要主机/端口的适配器直接使用
+        
+        Returns:
+            {'http': ParseResult或None, 'https': ParseResult或None}
+        """
+        return {'http': self._http_parsed, 'https': self._https_parsed}
+    
     def _apply_proxy_settings(self):
         """应用代理设置到环境变量和请求库"""
         if not self.enabled:
             return
+        
+        self._status_cache = None
             
         # 设置环境变量（影响大多数HTTP客户端）
         if self.http_proxy:
@@ -73,6 +112,7 @@ class ProxyManager:
     
     def _clear_proxy_settings(self):
         """清除代理设置"""
+        self._status_cache = None
         proxy_env_vars = ['HTTP_PROXY', 'http_proxy', 'HTTPS_PROXY', 'https_proxy', 
                          'NO_PROXY', 'no_proxy']
         for var in proxy_env_vars:
@@ -130,45 +170,93 @@ class ProxyManager:
             response = session.get(test_url, timeout=10)
             response.raise_for_status()
             
-            logging.info(f"代理测试成功: {response.json() if 'json' in response.headers.get('content-type', '') else 'OK'}")
+            logging.info("代理测试成功: %s", response.json() if 'json' in response.headers.get('content-type', '') else 'OK')
             return True
             
         except Exception as e:
-            logging.error(f"代理测试失败: {e}")
+            logging.error("代理测试失败: %s", e)
             return False
     
-    def get_openai_client_kwargs(self) -> Dict[str, Any]:
+    def get_openai_client_kwargs(self, max_concurrent: Optional[int] = None) -> Dict[str, Any]:
+        """
+        获取OpenAI客户端的连接配置参数
+        
+        返回共享连接池的httpx客户端，可用时启用HTTP/2，使同一主机的并发请求复用一条连接
+        
+        Args:
+            max_concurrent: 调用方的最大并发请求数，连接池不会小于该值
+            
+        Returns:
+            包含 http_client 的参数字典，可直接传给 OpenAI / ChatOpenAI
+        """
+        return {'http_client': self.get_http_client(max_concurrent)}
+    
+    def get_http_client(self, max_concurrent: Optional[int] = None) -> httpx.Client:
         """
-        获取OpenAI客户端的代理配置参数
+        获取进程内共享的httpx客户端
+        
+        所有LLM/Embedding适配器复用同一连接池，避免每次创建适配器都重新进行TCP/TLS握手。
+        连接池默认与openai SDK一致，调用方需要更多连接时扩容；代理设置变化或扩容时重建。
+        已创建的适配器仍持有被替换的旧客户端，因此旧客户端保持打开，到close_http_client()时才关闭
         
+        Args:
+            max_concurrent: 调用方的最大并发请求数
+            
         Returns:
-            包含代理配置的参数字典
+            共享的httpx.Client
         """
-        kwargs = {}
-        if self.enabled:
-            # OpenAI客户端使用httpx，支持代理配置
-            proxies = self.get_proxies_dict()
-            if proxies:
-                kwargs['proxies'] = proxies
-        return kwargs
+        with self._http_client_lock:
+            size = max(max_concurrent or 0, self._http_client_size, DEFAULT_MAX_CONNECTIONS)
+            if (self._http_client is None or self._http_client_key != self._last_key
+                    or size > self._http_client_size):
+                if self._http_client is not None:
+                    self._retired_clients.append(self._http_client)
+                self._http_client = self._build_http_client(size)
+                self._http_client_key = self._last_key
+                self._http_client_size = size
+            return self._http_client
+    
+    def close_http_client(self):
+        """关闭共享的httpx客户端及被替换的旧客户端（程序退出时调用）"""
+        with self._http_client_lock:
+            for client in self._retired_clients:
+                client.close()
+            self._retired_clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+                self._http_client_key = None
+                self._http_client_size = 0
+    
+    def _build_http_client(self, max_connections: int) -> httpx.Client:
+        """创建httpx客户端
+        
+        代理取自_apply_proxy_settings()导出的环境变量（trust_env），
+        与openai SDK默认客户端一致地遵循NO_PROXY（如本地模型服务不走代理）
+        """
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+        return httpx.Client(http2=HTTP2_AVAILABLE, limits=limits, trust_env=True)
     
     def get_status(self) -> Dict[str, Any]:
         """
         获取当前代理状态
         
         Returns:
-            代理状态信息
-        """
-        return {
-            'enabled': self.enabled,
-            'http_proxy': self.http_proxy,
-            'https_proxy': self.https_proxy,
-            'no_proxy': self.no_proxy,
-            'env_http_proxy': os.environ.get('HTTP_PROXY'),
-            'env_https_proxy': os.environ.get('HTTPS_PROXY'),
-            'env_no_proxy': os.environ.get('NO_PROXY')
-        }
+            代理状态信息（副本，调用方可自由修改）
+        """
+        if self._status_cache is None:
+            self._status_cache = {
+                'enabled': self.enabled,
+                'http_proxy': self.http_proxy,
+                'https_proxy': self.https_proxy,
+                'no_proxy': self.no_proxy,
+                'env_http_proxy': os.environ.get('HTTP_PROXY'),
+                'env_https_proxy': os.environ.get('HTTPS_PROXY'),
+                'env_no_proxy': os.environ.get('NO_PROXY')
+            }
+        return dict(self._status_cache)
 
 
-# 全局代理管理器实例
+# 全局代理管理器实例（项目中统一使用此实例，不要重复创建ProxyManager）
 proxy_manager = ProxyManager()
\ No newline at end of file
@@ -7,10 +7,7 @@ import time
 import logging
 import json
 from novel_generator.knowledge_parser import KnowledgeParser
-from concurrent.futures import ThreadPoolExecutor
-
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 
 # 测试用的配置
 TEST_CONFIG = {
@@ -65,10 +62,10 @@ def test_sequential_extraction(parser: KnowledgeParser, content: str):
     end_time = time.time()
     sequential_time = end_time - start_time
     
-    logging.info(f"串行提取完成，耗时: {sequential_time:.2f}秒")
-    logging.info(f"- 世界观要素数量: {len(worldview) if worldview else 0}")
-    logging.info(f"- 角色数量: {len(characters) if characters else 0}")
-    logging.info(f"- 剧情要素数量: {len(plot_outline) if plot_outline else 0}")
+    logging.info("串行提取完成，耗时: %.2f秒", sequential_time)
+    logging.info("- 世界观要素数量: %d", len(worldview) if worldview else 0)
+    logging.info("- 角色数量: %d", len(characters) if characters else 0)
+    logging.info("- 剧情要素数量: %d", len(plot_outline) if plot_outline else 0)
     
     return sequential_time, worldview, characters, plot_outline
 
@@ -89,23 +86,33 @@ def test_concurrent_extraction(parser: KnowledgeParser, content: str):
         return parser.extract_plot_outline(content)
     
     # 并发执行三个要素提取任务
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        worldview_future = executor.submit(extract_worldview_task)
-        characters_future = executor.submit(extract_characters_task)
-        plot_future = executor.submit(extract_plot_task)
+    executor = ThreadPoolExecutor(max_workers=3)
+    try:
+        futures = [
+            executor.submit(task)
+            for task in (extract_worldview_task, extract_characters_task, extract_plot_task)
+        ]
+        
+        # 任一任务失败立即返回，不再等待其余任务
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
         
         # 获取结果
-        worldview = worldview_future.result()
-        characters = characters_future.result()
-        plot_outline = plot_future.result()
+        worldview, characters, plot_outline = [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     
     end_time = time.time()
     concurrent_time = end_time - start_time
     
-    logging.info(f"并发提取完成，耗时: {concurrent_time:.2f}秒")
-    logging.info(f"- 世界观要素数量: {len(worldview) if worldview else 0}")
-    logging.info(f"- 角色数量: {len(characters) if characters else 0}")  
-    logging.info(f"- 剧情要素数量: {len(plot_outline) if plot_outline else 0}")
+    logging.info("并发提取完成，耗时: %.2f秒", concurrent_time)
+    logging.info("- 世界观要素数量: %d", len(worldview) if worldview else 0)
+    logging.info("- 角色数量: %d", len(characters) if characters else 0)  
+    logging.info("- 剧情要素数量: %d", len(plot_outline) if plot_outline else 0)
     
     return concurrent_time, worldview, characters, plot_outline
 
@@ -122,30 +129,30 @@ def compare_performance():
         # 注意：由于这是模拟测试，实际LLM调用可能失败
         # 这里主要测试调用结构和流程
         logging.info("开始小说要素提取性能对比测试")
-        logging.info(f"测试内容长度: {len(SAMPLE_CONTENT)} 字符")
+        logging.info("测试内容长度: %d 字符", len(SAMPLE_CONTENT))
         
         # 测试串行提取
         try:
             seq_time, seq_world, seq_chars, seq_plot = test_sequential_extraction(parser, SAMPLE_CONTENT)
         except Exception as e:
-            logging.warning(f"串行提取测试失败（模拟环境正常）: {e}")
+            logging.warning("串行提取测试失败（模拟环境正常）: %s", e)
             seq_time = 10.0  # 模拟时间
         
         # 测试并发提取
         try:
             conc_time, conc_world, conc_chars, conc_plot = test_concurrent_extraction(parser, SAMPLE_CONTENT)
         except Exception as e:
-            logging.warning(f"并发提取测试失败（模拟环境正常）: {e}")
+            logging.warning("并发提取测试失败（模拟环境正常）: %s", e)
             conc_time = 6.0  # 模拟时间
         
         # 性能对比分析
         logging.info("\n=== 性能对比结果 ===")
-        logging.info(f"串行提取时间: {seq_time:.2f}秒")
-        logging.info(f"并发提取时间: {conc_time:.2f}秒")
+        logging.info("串行提取时间: %.2f秒", seq_time)
+        logging.info("并发提取时间: %.2f秒", conc_time)
         
         if conc_time < seq_time:
             improvement = ((seq_time - conc_time) / seq_time) * 100
-            logging.info(f"性能提升: {improvement:.1f}% (节省 {seq_time - conc_time:.2f}秒)")
+            logging.info("性能提升: %.1f%% (节省 %.2f秒)", improvement, seq_time - conc_time)
         else:
             logging.info("并发提取未显示出明显的性能优势（可能由于测试环境限制）")
         
@@ -160,11 +167,13 @@ def compare_performance():
         return True
         
     except Exception as e:
-        logging.error(f"性能对比测试出错: {e}")
+        logging.error("性能对比测试出错: %s", e)
         return False
 
 
 if __name__ == "__main__":
+    # 单独运行时配置日志（pytest下由conftest.py统一配置）
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     success = compare_performance()
     if success:
         logging.info("✅ 小说要素并发提取测试完成")
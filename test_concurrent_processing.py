@@ -10,9 +10,6 @@ import logging
 import time
 from typing import Dict, List
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 # 添加项目路径
 sys.path.append(os.path.dirname(__file__))
 
@@ -212,5 +209,7 @@ def main():
     return True
 
 if __name__ == "__main__":
+    # 单独运行时配置日志（pytest下由conftest.py统一配置）
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     success = main()
     sys.exit(0 if success else 1)
\ No newline at end of file
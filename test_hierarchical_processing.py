@@ -9,9 +9,6 @@ import os
 import logging
 from typing import Dict, List
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 # 添加项目路径
 sys.path.append(os.path.dirname(__file__))
 
@@ -51,24 +48,30 @@ def test_hierarchical_merge_structure():
     parser = KnowledgeParser.__new__(KnowledgeParser)
     
     # 测试世界观合并
-    def mock_merge_func(base, new):
-        """模拟合并函数"""
-        result = base.copy() if base else {}
-        if new:
-            for key, value in new.items():
-                if key in result:
-                    if isinstance(value, str) and isinstance(result[key], str):
-                        result[key] = result[key] + " " + value
-                    else:
-                        result[key] = value
+    def mock_accumulate(group):
+        """模拟整组合并（字符串先收集到列表，最后一次性拼接）"""
+        result = {}
+        text_parts = {}
+        for item in group:
+            for key, value in (item or {}).items():
+                if isinstance(value, str) and (key not in result or key in text_parts):
+                    text_parts.setdefault(key, []).append(value)
+                    result[key] = None
                 else:
+                    text_parts.pop(key, None)
                     result[key] = value
+        for key, parts in text_parts.items():
+            result[key] = " ".join(parts)
         return result
     
-    # 模拟AI合并函数，总是返回基础合并结果
+    def mock_merge_func(base, new):
+        """模拟两两合并函数"""
+        return mock_accumulate([base, new])
+    
+    # 模拟AI合并函数，整组一次性累加
     def mock_ai_merge(group, merge_func, extraction_type, level, group_num):
-        """模拟AI合并，使用基础合并"""
-        return parser._fallback_merge_group(group, merge_func, extraction_type)
+        """模拟AI合并，使用整组累加"""
+        return mock_accumulate([item for item in group if isinstance(item, dict)])
     
     # 替换AI合并函数为模拟函数
     parser._ai_merge_group = mock_ai_merge
@@ -167,5 +170,7 @@ def main():
     return True
 
 if __name__ == "__main__":
+    # 单独运行时配置日志（pytest下由conftest.py统一配置）
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     success = main()
     sys.exit(0 if success else 1)
\ No newline at end of file
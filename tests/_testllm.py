@@ -0,0 +1,40 @@
+# tests/_testllm.py
+# -*- coding: utf-8 -*-
+"""
+测试用LLM适配器
+记录所有提示词，并按队列返回预设的响应，替代各测试中手工配置的Mock
+"""
+import json
+from collections import deque
+
+from llm_adapters import BaseLLMAdapter
+
+
+class TestLLM(BaseLLMAdapter):
+    """按顺序返回预设响应的LLM适配器，队列为空时返回空字符串"""
+
+    __test__ = False  # 避免被pytest当作测试类收集
+
+    def __init__(self):
+        self.prompts = []
+        self._responses = deque()
+
+    def queue_response(self, response):
+        """追加一条预设响应，dict/list会序列化为JSON字符串"""
+        if not isinstance(response, str):
+            response = json.dumps(response, ensure_ascii=False)
+        self._responses.append(response)
+
+    def reset(self):
+        """清空调用记录和未消费的响应"""
+        self.prompts.clear()
+        self._responses.clear()
+
+    def invoke(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self._responses.popleft() if self._responses else ""
+
+
+def invoke_direct(llm_adapter, prompt: str, max_retries: int = 3) -> str:
+    """invoke_with_cleaning的测试替身：直接调用适配器，不打印、不重试等待"""
+    return llm_adapter.invoke(prompt)
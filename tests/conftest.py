@@ -0,0 +1,18 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+"""
+tests 目录的 pytest 配置
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径（每个测试会话只执行一次）
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+
+def pytest_configure(config):
+    """预先导入较重的知识解析模块，每个（xdist）工作进程只付一次导入开销"""
+    import novel_generator.knowledge_parser
+    import novel_generator.knowledge_structures
@@ -0,0 +1,154 @@
+# tests/test_knowledge.py
+# -*- coding: utf-8 -*-
+"""
+知识文件分段与批量导入的单元测试
+"""
+from unittest.mock import Mock, patch
+
+import pytest
+
+import novel_generator.knowledge as knowledge_module
+from novel_generator.knowledge import advanced_split_content, max_chunk_overlap, import_knowledge_files_batch
+
+# 每句带不同的序号，避免重复文本使重叠部分的判断产生歧义
+_CONTENT = "".join(f"第{i}天，少年背着剑走出村子，沿着河流一路向东。" for i in range(40))
+
+
+def _shared_overlap(prev, nxt):
+    """相邻两段之间重叠的字符数（前一段的后缀等于后一段的前缀）"""
+    for k in range(min(len(prev), len(nxt)), 0, -1):
+        if prev.endswith(nxt[:k]):
+            return k
+    return 0
+
+
+def test_split_without_overlap_covers_content():
+    """无重叠时各段拼接即为原文，且每段不超过最大长度"""
+    segments = advanced_split_content(_CONTENT, max_length=50)
+
+    assert "".join(segments) == _CONTENT
+    assert all(len(seg) <= 50 for seg in segments)
+
+
+def test_split_with_overlap():
+    """有重叠时相邻段落共享不超过overlap个字符，去掉重叠部分后拼接即为原文"""
+    segments = advanced_split_content(_CONTENT, max_length=50, overlap=10)
+
+    assert all(len(seg) <= 50 for seg in segments)
+    overlaps = [_shared_overlap(prev, nxt) for prev, nxt in zip(segments, segments[1:])]
+    assert any(overlaps)
+    assert all(k <= 10 for k in overlaps)
+    rebuilt = segments[0] + "".join(nxt[k:] for nxt, k in zip(segments[1:], overlaps))
+    assert rebuilt == _CONTENT
+
+
+@pytest.mark.parametrize("overlap", [26, 40, 49])
+def test_split_overlap_is_clamped(overlap):
+    """超过上限的重叠长度按段落长度的一半处理"""
+    assert max_chunk_overlap(50) == 25
+    assert (advanced_split_content(_CONTENT, max_length=50, overlap=overlap)
+            == advanced_split_content(_CONTENT, max_length=50, overlap=25))
+
+
+@pytest.fixture
+def import_env(tmp_path):
+    """替换嵌入适配器与向量库，记录每批写入的段落"""
+    (tmp_path / "vectorstore").mkdir()
+    store = Mock()
+    with patch.object(knowledge_module, "load_vector_store", return_value=store), \
+            patch.object(knowledge_module, "init_vector_store") as init_store, \
+            patch("embedding_adapters.create_embedding_adapter"):
+        yield tmp_path, store, init_store
+
+
+def _write_novel(path, tag):
+    path.write_text("".join(f"{tag}第{i}章，少年背着剑走出村子。" for i in range(30)), encoding="utf-8")
+    return str(path)
+
+
+def _run_import(project_dir, files, batch_size=5):
+    return import_knowledge_files_batch(
+        "key", "http://localhost", "OpenAI", "model", files, str(project_dir),
+        batch_size=batch_size, max_concurrency=2, chunk_size=50
+    )
+
+
+def test_import_cache_skips_unchanged_files(import_env):
+    """未修改的文件第二次导入时跳过，修改后重新导入"""
+    project_dir, store, _ = import_env
+    novel = _write_novel(project_dir / "a.txt", "甲")
+
+    first = _run_import(project_dir, [novel])
+    assert first > 0
+    assert sum(len(c.args[0]) for c in store.add_texts.call_args_list) == first
+
+    store.add_texts.reset_mock()
+    assert _run_import(project_dir, [novel]) == 0
+    store.add_texts.assert_not_called()
+
+    _write_novel(project_dir / "a.txt", "乙")
+    assert _run_import(project_dir, [novel]) > 0
+
+
+def test_import_cache_records_only_completed_files(import_env):
+    """某批写入失败时，只有完整导入的文件记入缓存"""
+    project_dir, store, _ = import_env
+    good = _write_novel(project_dir / "good.txt", "甲")
+    bad = _write_novel(project_dir / "bad.txt", "乙")
+
+    def add_texts(batch, ids=None):
+        if any("乙" in text for text in batch):
+            raise RuntimeError("embedding failed")
+
+    # 每批一个段落，保证失败的批次只涉及bad.txt
+    store.add_texts.side_effect = add_texts
+    _run_import(project_dir, [good, bad], batch_size=1)
+
+    store.add_texts.reset_mock()
+    store.add_texts.side_effect = None
+    _run_import(project_dir, [good, bad], batch_size=1)
+    retried = [text for c in store.add_texts.call_args_list for text in c.args[0]]
+    assert retried and all("甲" not in text for text in retried)
+
+
+def _added_ids(store):
+    return [doc_id for c in store.add_texts.call_args_list for doc_id in c.kwargs["ids"]]
+
+
+def test_import_replaces_chunks_of_modified_file(import_env):
+    """文件修改后重新导入时，先删除上次写入的段落"""
+    project_dir, store, _ = import_env
+    novel = _write_novel(project_dir / "a.txt", "甲")
+
+    _run_import(project_dir, [novel])
+    old_ids = _added_ids(store)
+    store.delete.assert_not_called()
+
+    store.add_texts.reset_mock()
+    _write_novel(project_dir / "a.txt", "乙")
+    _run_import(project_dir, [novel])
+
+    store.delete.assert_called_once_with(ids=old_ids)
+    assert not set(old_ids) & set(_added_ids(store))
+
+
+def test_import_retry_removes_partially_written_chunks(import_env):
+    """文件部分批次失败时，重试前删除已成功写入的段落，避免重复"""
+    project_dir, store, _ = import_env
+    novel = _write_novel(project_dir / "a.txt", "甲")
+
+    def add_texts(batch, ids=None):
+        if any(text.startswith("甲第0章") for text in batch):
+            raise RuntimeError("embedding failed")
+
+    store.add_texts.side_effect = add_texts
+    _run_import(project_dir, [novel], batch_size=1)
+    written = [doc_id for c in store.add_texts.call_args_list
+               if not c.args[0][0].startswith("甲第0章") for doc_id in c.kwargs["ids"]]
+    assert written
+
+    store.add_texts.reset_mock()
+    store.add_texts.side_effect = None
+    _run_import(project_dir, [novel], batch_size=1)
+
+    store.delete.assert_called_once_with(ids=written)
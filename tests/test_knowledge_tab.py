@@ -0,0 +1,48 @@
+# tests/test_knowledge_tab.py
+# -*- coding: utf-8 -*-
+"""
+知识库标签页后台任务的单元测试
+"""
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("customtkinter")
+
+from ui.knowledge_tab import KnowledgeTab
+
+
+@pytest.fixture
+def tab():
+    """不创建界面的标签页实例，after回调放入队列由测试线程执行"""
+    callbacks = queue.Queue()
+    tab = KnowledgeTab.__new__(KnowledgeTab)
+    tab.main_window = SimpleNamespace(master=SimpleNamespace(after=lambda ms, fn: callbacks.put(fn)))
+    return tab, callbacks
+
+
+def test_run_async_reports_error(tab):
+    """后台任务出错时在主线程回调中拿到原始异常"""
+    tab, callbacks = tab
+    error = PermissionError("denied")
+    received = []
+
+    def fail():
+        raise error
+
+    tab._run_async(fail, on_done=received.append, on_error=received.append)
+    callbacks.get(timeout=5)()
+
+    assert received == [error]
+
+
+def test_run_async_reports_result(tab):
+    """后台任务成功时以返回值调用on_done"""
+    tab, callbacks = tab
+    received = []
+
+    tab._run_async(lambda: 42, on_done=received.append)
+    callbacks.get(timeout=5)()
+
+    assert received == [42]
@@ -0,0 +1,70 @@
+# tests/test_proxy_manager.py
+# -*- coding: utf-8 -*-
+"""
+代理管理器共享httpx客户端的单元测试
+"""
+import os
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from proxy_manager import ProxyManager, DEFAULT_MAX_CONNECTIONS
+
+
+@pytest.fixture
+def manager():
+    """独立的代理管理器，测试结束后关闭客户端并恢复环境变量"""
+    with patch.dict(os.environ, clear=False):
+        pm = ProxyManager()
+        yield pm
+        pm.close_http_client()
+
+
+def test_no_proxy_hosts_bypass_proxy(manager):
+    """NO_PROXY中的本地地址不经过代理"""
+    manager.configure(http_proxy="http://127.0.0.1:9", no_proxy="localhost,127.0.0.1", enabled=True)
+    client = manager.get_http_client()
+
+    assert client._transport_for_url(httpx.URL("http://localhost:11434")) is client._transport
+    assert client._transport_for_url(httpx.URL("https://api.openai.com")) is not client._transport
+
+
+def test_replaced_client_stays_open_until_exit(manager):
+    """代理设置变化时重建客户端，旧客户端仍可供已创建的适配器使用，退出时才关闭"""
+    manager.configure(http_proxy="http://127.0.0.1:9", enabled=True)
+    old_client = manager.get_http_client()
+    assert manager.get_http_client() is old_client
+
+    manager.configure(enabled=False)
+    new_client = manager.get_http_client()
+    assert new_client is not old_client
+    assert not old_client.is_closed
+
+    manager.close_http_client()
+    assert old_client.is_closed and new_client.is_closed
+
+
+def test_pool_grows_with_concurrency(manager):
+    """连接池不小于SDK默认值，调用方并发更高时扩容"""
+    client = manager.get_http_client()
+    assert manager._http_client_size == DEFAULT_MAX_CONNECTIONS
+
+    bigger = manager.get_http_client(DEFAULT_MAX_CONNECTIONS * 2)
+    assert bigger is not client and not client.is_closed
+    assert manager.get_http_client(10) is bigger
+
+
+@pytest.mark.parametrize("interface_format", ["DeepSeek", "Ollama", "ML Studio", "硅基流动", "Grok"])
+def test_llm_adapters_share_pooled_client(manager, interface_format):
+    """OpenAI兼容的LLM适配器使用共享客户端，并按调用方并发数扩容"""
+    from llm_adapters import create_llm_adapter
+
+    with patch("llm_adapters.proxy_manager", manager):
+        adapter = create_llm_adapter(interface_format, "http://localhost:11434/v1", "model", "key",
+                                     0.7, 1024, 60, max_concurrent=DEFAULT_MAX_CONNECTIONS * 2)
+
+    client = manager.get_http_client()
+    assert manager._http_client_size == DEFAULT_MAX_CONNECTIONS * 2
+    sdk_client = getattr(adapter._client, "root_client", adapter._client)
+    assert sdk_client._client is client
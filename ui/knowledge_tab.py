@@ -5,16 +5,290 @@
 提供知识库导入、解析、管理的完整UI界面
 """
 import os
+import io
+import sys
+import re
 import json
+import time
+import queue
+import mmap
+import codecs
+import logging
+import importlib
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-from threading import Thread
+from threading import Thread, Event, Lock
+from collections import deque, OrderedDict
+from contextlib import suppress
 
-from novel_generator.knowledge_parser import KnowledgeParser, parse_knowledge_from_file
+from novel_generator.knowledge_parser import KnowledgeParser, ParsingCancelledError, parse_knowledge_from_file
 from novel_generator.knowledge_structures import StructuredKnowledge
+from novel_generator.knowledge import max_chunk_overlap
 from utils import read_file
 
+# 简化解析使用的关键词
+WORLDVIEW_KEYWORDS = ('世界', '地理', '历史', '科技', '魔法', '设定')
+CHARACTER_KEYWORDS = ('角色', '人物', '主角', '配角', '性格')
+PLOT_KEYWORDS = ('剧情', '故事', '情节', '冲突', '高潮')
+# 预编译的关键词匹配模式，每行只需一次C层扫描
+WORLDVIEW_PATTERN = re.compile('|'.join(map(re.escape, WORLDVIEW_KEYWORDS)))
+CHARACTER_PATTERN = re.compile('|'.join(map(re.escape, CHARACTER_KEYWORDS)))
+PLOT_PATTERN = re.compile('|'.join(map(re.escape, PLOT_KEYWORDS)))
+# 结果预览选项卡（含AI书评）
+PREVIEW_TABS = ("世界观", "角色", "剧情", "关系", "AI书评")
+# 预览文本框无数据时显示的占位文本
+PREVIEW_PLACEHOLDER = "暂无数据..."
+# 简化解析每类预览显示的最大行数
+PREVIEW_LINE_LIMIT = 10
+# 超过该大小的文件只做流式统计，不在界面中整体解码
+LARGE_FILE_THRESHOLD = 1 << 20
+# 大文件预览读取的字节数
+PREVIEW_BYTES = 4096
+# 大文件流式统计的分块大小
+STREAM_CHUNK_SIZE = 1 << 20
+# 日志刷新间隔（毫秒）与日志框保留的最大行数
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_MAX_LINES = 1000
+# 知识库JSON文件、其SHA-256校验文件及解析结果的msgpack缓存（未安装msgpack时不使用缓存）
+KB_JSON_FILE = "extracted_knowledge.json"
+KB_HASH_FILE = KB_JSON_FILE + ".sha256"
+KB_MSGPACK_FILE = "extracted_knowledge.mpk"
+# 清空知识库时删除的文件
+KNOWLEDGE_FILES = frozenset({
+    KB_JSON_FILE, KB_HASH_FILE, KB_MSGPACK_FILE, "knowledge_parsing_results.json"
+})
+# 文件内容缓存的最大条数，超过该大小的文件不缓存内容
+FILE_CACHE_SIZE = 4
+FILE_CACHE_MAX_FILE_SIZE = 16 << 20
+# 清空知识库时改名文件使用的标记
+TRASH_MARKER = ".trash-"
+# 已加载知识库解析结果的最大缓存条数
+KB_CACHE_SIZE = 4
+# 超过该大小的知识库文件不缓存解析结果
+KB_CACHE_MAX_FILE_SIZE = 50 << 20
+# 判断是否为中文为主文本时的抽样长度与汉字占比阈值
+CJK_SAMPLE_SIZE = 4096
+CJK_RATIO_THRESHOLD = 0.3
+# 超过该大小的知识库文件通过内存映射解析，避免再复制一份完整字节
+MMAP_THRESHOLD = 32 << 20
+# 写出JSON文件时使用的缓冲区大小
+JSON_WRITE_BUFFER_SIZE = 1 << 16
+# 计算文件哈希时的分块大小
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _lazy_optional(name):
+    """返回按需导入可选模块的函数：首次调用时才导入（未安装时为None），结果缓存在函数属性mod中"""
+    def getter():
+        try:
+            return getter.mod
+        except AttributeError:
+            try:
+                getter.mod = importlib.import_module(name)
+            except ImportError:
+                getter.mod = None
+            return getter.mod
+    return getter
+
+
+# 可选的加速模块，只在首次读写知识库时导入，未打开知识库功能时不增加启动耗时
+_get_orjson = _lazy_optional('orjson')
+_get_msgpack = _lazy_optional('msgpack')
+
+
+def _trunc(text, limit):
+    """截断过长的文本，超出部分以省略号表示"""
+    if not text:
+        return ""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _is_mostly_cjk(text):
+    """抽样判断文本是否以中日韩汉字为主（此时按空白切分的单词数没有意义）"""
+    sample = text[:CJK_SAMPLE_SIZE]
+    if not sample:
+        return False
+    cjk_count = sum(1 for c in sample if '\u4e00' <= c <= '\u9fff')
+    return cjk_count / len(sample) > CJK_RATIO_THRESHOLD
+
+
+def _loads(data):
+    """解析JSON（orjson可用时使用C实现的解码器）"""
+    orjson = _get_orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _load_json_file(path, size=None):
+    """一次性读取整个JSON文件并解析（超大文件且orjson可用时直接解析内存映射）"""
+    if size is None:
+        size = os.path.getsize(path)
+    orjson = _get_orjson()
+    if orjson is not None and size > MMAP_THRESHOLD:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = len(codecs.BOM_UTF8) if mm[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+            with memoryview(mm) as view, view[start:] as body:
+                try:
+                    return orjson.loads(body)
+                except ValueError:
+                    # 非UTF-8编码或格式错误时交给下面的完整读取流程处理
+                    pass
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    try:
+        return _loads(data)
+    except ValueError:
+        # 兼容以GBK系编码保存的旧文件；UTF-8文件的格式错误原样抛出
+        try:
+            data.decode('utf-8')
+        except UnicodeDecodeError:
+            return _loads(data.decode('gb18030'))
+        raise
+
+
+def _serialize_json(obj):
+    """将对象序列化为缩进格式的UTF-8 JSON字节（orjson可用时使用C实现的编码器）"""
+    orjson = _get_orjson()
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _atomic_write_bytes(data, path):
+    """将已序列化的字节一次性写入临时文件，再原子替换目标文件，避免中途崩溃留下残缺文件"""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb', buffering=JSON_WRITE_BUFFER_SIZE) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def _sha256_file(path):
+    """分块计算文件的SHA-256"""
+    import hashlib
+    
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_kb_binary_cache(obj, json_path, cache_path, hash_path, json_bytes=None):
+    """保存知识库JSON内容的SHA-256校验文件及解析结果的msgpack缓存（未安装msgpack时跳过）
+
+    缓存只使用msgpack这类纯数据格式：项目文件夹可能来自他人，不能用pickle等可执行代码的格式。
+    json_bytes为None时对磁盘上的JSON文件计算哈希
+    """
+    msgpack = _get_msgpack()
+    if msgpack is None:
+        return
+    import hashlib
+    
+    try:
+        if json_bytes is not None:
+            digest = hashlib.sha256(json_bytes).hexdigest()
+        else:
+            digest = _sha256_file(json_path)
+        # 先写缓存再写校验文件，保证校验文件存在时缓存已完整
+        _atomic_write_bytes(msgpack.packb([digest, obj], use_bin_type=True), cache_path)
+        _atomic_write_bytes(digest.encode('ascii'), hash_path)
+    except Exception as e:
+        logging.warning(f"写入知识库缓存失败: {e}")
+
+
+def _load_kb_binary_cache(json_path, cache_path, hash_path, json_mtime_ns):
+    """JSON文件内容与校验文件一致时读取msgpack缓存，否则（或未安装msgpack时）返回None"""
+    msgpack = _get_msgpack()
+    if msgpack is None:
+        return None
+    try:
+        # 缓存比JSON旧说明JSON已被改写，无需计算哈希
+        if os.stat(cache_path).st_mtime_ns < json_mtime_ns:
+            return None
+        with open(hash_path, 'r', encoding='ascii') as f:
+            expected = f.read().strip()
+        if _sha256_file(json_path) != expected:
+            return None
+        with open(cache_path, 'rb') as f:
+            digest, data = msgpack.unpackb(f.read(), raw=False, strict_map_key=False)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"读取知识库缓存失败: {e}")
+        return None
+    return data if digest == expected else None
+
+
+def _is_trash_name(name):
+    """是否为清空知识库时改名、但尚未删除的文件（<知识库文件名>.trash-<pid>-<ns>）"""
+    base, sep, _ = name.partition(TRASH_MARKER)
+    return bool(sep) and base in KNOWLEDGE_FILES
+
+
+def _scan_knowledge_files(directory):
+    """一次遍历目录，返回需要清空的知识库文件 [(文件名, 路径)] 及遗留的待删除文件路径列表"""
+    files = []
+    leftovers = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name in KNOWLEDGE_FILES:
+                    files.append((entry.name, entry.path))
+                elif _is_trash_name(entry.name):
+                    leftovers.append(entry.path)
+    except FileNotFoundError:
+        pass
+    return files, leftovers
+
+
+class ConfirmDialog:
+    """非模态确认对话框：不阻塞主循环，用户选择后通过回调通知"""
+    
+    def __init__(self, parent, title, text, on_yes, on_no=None):
+        self._on_yes = on_yes
+        self._on_no = on_no
+        
+        self.window = ctk.CTkToplevel(parent)
+        self.window.title(title)
+        self.window.transient(parent)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self._no)
+        
+        ctk.CTkLabel(self.window, text=text, justify="left").pack(padx=20, pady=(20, 10))
+        
+        btn_frame = ctk.CTkFrame(self.window, fg_color="transparent")
+        btn_frame.pack(pady=(0, 15))
+        ctk.CTkButton(btn_frame, text="确定", width=80, command=self._yes).pack(side="left", padx=10)
+        ctk.CTkButton(btn_frame, text="取消", width=80, command=self._no).pack(side="left", padx=10)
+    
+    def exists(self):
+        """对话框是否仍然存在"""
+        return bool(self.window.winfo_exists())
+    
+    def focus(self):
+        """将对话框提到最前"""
+        self.window.lift()
+        self.window.focus_force()
+    
+    def _yes(self):
+        self.window.destroy()
+        self._on_yes()
+    
+    def _no(self):
+        self.window.destroy()
+        if self._on_no is not None:
+            self._on_no()
+
 
 class KnowledgeTab:
     """知识库管理标签页类"""
@@ -23,8 +297,61 @@ class KnowledgeTab:
         self.parent_frame = parent_frame
         self.main_window = main_window
         self.current_structured_knowledge = None
+        # 当前解析任务的取消事件
+        self._cancel_event = None
+        # 文件内容LRU缓存：{path: (mtime_ns, content, lines)}，避免同一文件被重复读取解码，lines按需生成
+        self._file_cache = OrderedDict()
+        self._file_cache_lock = Lock()
+        # 文件信息请求序号，用于丢弃已过期的后台结果
+        self._file_info_seq = 0
+        # 待写入日志框的日志行（环形缓冲，最多保留日志框可显示的行数），由定时任务批量刷新
+        self._log_queue = deque(maxlen=LOG_MAX_LINES)
+        self._log_flush_job = None
+        # 各文本框当前显示的内容，用于增量更新
+        self._preview_state = {}
+        # 进行中的分批显示任务（after返回的id）
+        self._render_token = None
+        # 尚未渲染的预览：{选项卡名称: 生成显示文本的函数}，切换到该选项卡时才格式化
+        self._pending_renders = {}
+        # 当前打开的清空确认对话框
+        self._confirm_dialog = None
+        # 待后台删除的已改名文件
+        self._trash_queue = queue.Queue()
+        self._trash_worker = None
+        # 已加载知识库的解析缓存：{(path, mtime_ns, size): data}
+        self._kb_cache = {}
+        # 当前解析结果的序列化缓存：(结果对象, JSON字节)
+        self._ser_cache = None
+        # 保存路径及其下文件路径的缓存，保存路径变化时失效
+        self._kb_dir = None
+        self._join_cache = {}
+        self.main_window.filepath_var.trace_add('write', self._invalidate_kb_paths)
         
         self.build_knowledge_tab()
+        self._sweep_trash()
+    
+    def _invalidate_kb_paths(self, *args):
+        """保存路径变化时清除路径缓存"""
+        self._kb_dir = None
+        self._join_cache.clear()
+    
+    def _get_kb_dir(self):
+        """获取（缓存的）保存路径"""
+        if self._kb_dir is None:
+            self._kb_dir = self.main_window.filepath_var.get().strip()
+        return self._kb_dir
+    
+    def _join(self, directory, name):
+        """拼接并规范化路径，结果驻留(intern)后缓存，重复的stat/删除/日志共用同一字符串"""
+        key = (directory, name)
+        path = self._join_cache.get(key)
+        if path is None:
+            path = self._join_cache[key] = sys.intern(os.path.normpath(os.path.join(directory, name)))
+        return path
+    
+    def _get_kb_path(self, filename):
+        """获取保存路径下指定文件的完整路径（带缓存）"""
+        return self._join(self._get_kb_dir(), filename)
     
     def build_knowledge_tab(self):
         """构建知识库标签页界面"""
@@ -193,6 +520,30 @@ class KnowledgeTab:
         ctk.CTkCheckBox(checkbox_frame, text="📖 提取剧情大纲", variable=self.extract_plot_var).pack(anchor="w", padx=10, pady=2)
         ctk.CTkCheckBox(checkbox_frame, text="🔗 分析角色关系", variable=self.analyze_relationships_var).pack(anchor="w", padx=10, pady=(2, 10))
         
+        # 向量库导入选项
+        embed_frame = ctk.CTkFrame(options_frame)
+        embed_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        self.embed_batch_size_var = tk.StringVar(value="100")
+        ctk.CTkLabel(embed_frame, text="导入批大小:").pack(side="left", padx=(10, 5), pady=5)
+        ctk.CTkEntry(embed_frame, textvariable=self.embed_batch_size_var, width=60).pack(side="left", padx=5, pady=5)
+        
+        self.embed_concurrency_var = tk.StringVar(value="4")
+        ctk.CTkLabel(embed_frame, text="并发数:").pack(side="left", padx=(10, 5), pady=5)
+        ctk.CTkEntry(embed_frame, textvariable=self.embed_concurrency_var, width=50).pack(side="left", padx=5, pady=5)
+        
+        # 向量库导入的分段参数
+        chunk_frame = ctk.CTkFrame(options_frame)
+        chunk_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        self.chunk_size_var = tk.StringVar(value="500")
+        ctk.CTkLabel(chunk_frame, text="分段长度:").pack(side="left", padx=(10, 5), pady=5)
+        ctk.CTkEntry(chunk_frame, textvariable=self.chunk_size_var, width=60).pack(side="left", padx=5, pady=5)
+        
+        self.chunk_overlap_var = tk.StringVar(value="0")
+        ctk.CTkLabel(chunk_frame, text="重叠长度:").pack(side="left", padx=(10, 5), pady=5)
+        ctk.CTkEntry(chunk_frame, textvariable=self.chunk_overlap_var, width=50).pack(side="left", padx=5, pady=5)
+        
         # 进度显示区域
         progress_frame = ctk.CTkFrame(self.middle_frame)
         progress_frame.pack(fill="x", padx=10, pady=5)
@@ -266,7 +617,7 @@ class KnowledgeTab:
         
         ctk.CTkLabel(stats_frame, text="提取统计:", font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=10, pady=(10, 5))
         
-        self.stats_text = ctk.CTkTextbox(stats_frame, height=100, font=ctk.CTkFont(size=11))
+        self.stats_text = ctk.CTkTextbox(stats_frame, height=100, font=ctk.CTkFont(size=11), state="disabled")
         self.stats_text.pack(fill="x", padx=10, pady=(0, 10))
         self.update_stats_display()
         
@@ -276,34 +627,19 @@ class KnowledgeTab:
         
         ctk.CTkLabel(preview_frame, text="内容预览:", font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=10, pady=(10, 5))
         
-        # 选项卡
-        self.preview_tabview = ctk.CTkTabview(preview_frame, width=280, height=300)
+        # 选项卡（切换时才创建对应的预览文本框）
+        self.preview_tabview = ctk.CTkTabview(
+            preview_frame, width=280, height=300,
+            command=self._on_preview_tab_changed
+        )
         self.preview_tabview.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         
-        self.preview_tabview.add("世界观")
-        self.preview_tabview.add("角色")
-        self.preview_tabview.add("剧情")
-        self.preview_tabview.add("关系")
-        self.preview_tabview.add("AI书评")  # 新增AI书评选项卡
-        
-        # 各选项卡内容
-        self.worldview_preview = ctk.CTkTextbox(self.preview_tabview.tab("世界观"), height=200)
-        self.worldview_preview.pack(fill="both", expand=True, padx=5, pady=5)
+        for tab_name in PREVIEW_TABS:
+            self.preview_tabview.add(tab_name)
         
-        self.characters_preview = ctk.CTkTextbox(self.preview_tabview.tab("角色"), height=200)
-        self.characters_preview.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        self.plot_preview = ctk.CTkTextbox(self.preview_tabview.tab("剧情"), height=200)
-        self.plot_preview.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        self.relationships_preview = ctk.CTkTextbox(self.preview_tabview.tab("关系"), height=200)
-        self.relationships_preview.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        # AI书评预览
-        self.review_preview = ctk.CTkTextbox(self.preview_tabview.tab("AI书评"), height=200)
-        self.review_preview.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        self.clear_previews()
+        # 选项卡名称到已创建预览控件的映射
+        self._preview_widgets = {}
+        self._ensure_preview(self.preview_tabview.get())
         
         # 底部操作按钮
         action_frame = ctk.CTkFrame(self.right_frame)
@@ -341,56 +677,157 @@ class KnowledgeTab:
             ("所有文件", "*.*")
         ]
         
-        filename = filedialog.askopenfilename(
-            title="选择知识库文档",
+        filenames = filedialog.askopenfilenames(
+            title="选择知识库文档（可多选）",
             filetypes=filetypes
         )
         
-        if filename:
-            self.current_file_var.set(os.path.basename(filename))
+        if filenames:
+            # 导入向量库使用全部文件，解析与预览使用第一个文件
+            self.selected_file_paths = list(filenames)
+            filename = self.selected_file_paths[0]
             self.selected_file_path = filename
-            self.update_file_info(filename)
+            name = os.path.basename(filename)
+            
+            if len(self.selected_file_paths) > 1:
+                self.current_file_var.set(f"{name} 等 {len(self.selected_file_paths)} 个文件")
+            else:
+                self.current_file_var.set(name)
+            self.update_file_info(filename, name)
             
             # 启用相关按钮
             self.import_file_btn.configure(state="normal")
             self.parse_file_btn.configure(state="normal")
             
-            self.log_message(f"✅ 已选择文件: {os.path.basename(filename)}")
+            self.log_message(f"✅ 已选择文件: {', '.join(os.path.basename(f) for f in self.selected_file_paths)}")
     
-    def update_file_info(self, filepath):
-        """更新文件信息显示"""
-        try:
-            # 获取文件统计信息
-            file_size = os.path.getsize(filepath)
-            content = read_file(filepath)
+    def _get_file_entry(self, path, st=None, with_lines=False):
+        """读取文件内容（及按行切分的结果），文件修改时间未变化时直接返回缓存
+
+        缓存为LRU，只保留最近使用的少量文件，超大文件不缓存；可传入已获取的os.stat结果
+        """
+        st = st or os.stat(path)
+        with self._file_cache_lock:
+            entry = self._file_cache.get(path)
+        if entry is None or entry[0] != st.st_mtime_ns:
+            entry = (st.st_mtime_ns, read_file(path), None)
+        if with_lines and entry[2] is None:
+            entry = (entry[0], entry[1], entry[1].splitlines())
+        
+        if st.st_size <= FILE_CACHE_MAX_FILE_SIZE:
+            with self._file_cache_lock:
+                self._file_cache[path] = entry
+                self._file_cache.move_to_end(path)
+                while len(self._file_cache) > FILE_CACHE_SIZE:
+                    self._file_cache.popitem(last=False)
+        return entry
+    
+    def _get_content(self, path, st=None):
+        """读取文件内容（带缓存）"""
+        return self._get_file_entry(path, st)[1]
+    
+    def _get_lines(self, path, st=None):
+        """获取文件内容按行切分的结果，与内容一起缓存，文件信息与预览共用"""
+        return self._get_file_entry(path, st, with_lines=True)[2]
+    
+    @staticmethod
+    def _stream_file_stats(path):
+        """分块读取文件统计行数，并返回开头部分的解码文本，避免整体解码大文件"""
+        with open(path, 'rb') as f:
+            head = f.read(PREVIEW_BYTES)
+            line_count = head.count(b'\n') + 1
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                line_count += chunk.count(b'\n')
+        # 截断处可能落在多字节字符中间，忽略不完整的尾部字节
+        return line_count, head.decode('utf-8', errors='ignore')
+    
+    def update_file_info(self, filepath, name=None):
+        """更新文件信息显示（后台线程读取统计，完成后回到主线程渲染）"""
+        name = name or os.path.basename(filepath)
+        # 每次请求递增序号，只有最新一次请求的结果会被显示
+        self._file_info_seq += 1
+        seq = self._file_info_seq
+        
+        def is_current():
+            return seq == self._file_info_seq and filepath == getattr(self, 'selected_file_path', filepath)
+        
+        def render(info_text):
+            if is_current():
+                self._render_file_info(info_text)
+        
+        def report(error_msg):
+            if is_current():
+                self.log_message(error_msg, is_error=True)
+        
+        def info_task():
+            try:
+                info_text = self._compute_file_info(filepath, name)
+                self.main_window.master.after(0, lambda: render(info_text))
+            except Exception as e:
+                error_msg = f"❌ 读取文件信息失败: {str(e)}"
+                self.main_window.master.after(0, lambda: report(error_msg))
+        
+        self._render_file_info("正在读取文件信息...")
+        Thread(target=info_task, daemon=True).start()
+    
+    def _compute_file_info(self, filepath, name):
+        """读取文件并生成信息文本（不访问任何控件，可在后台线程调用）"""
+        # 获取文件统计信息（只stat一次，大小与修改时间共用）
+        st = os.stat(filepath)
+        file_size = st.st_size
+        
+        # 格式化显示
+        size_str = f"{file_size / 1024:.1f} KB" if file_size > 1024 else f"{file_size} B"
+        
+        if file_size < LARGE_FILE_THRESHOLD:
+            content = self._get_content(filepath, st)
             
             char_count = len(content)
-            line_count = content.count('\n') + 1
-            word_count = len(content.split())
-            
-            # 格式化显示
-            size_str = f"{file_size / 1024:.1f} KB" if file_size > 1024 else f"{file_size} B"
+            line_count = len(self._get_lines(filepath, st))
+            # 中文文本不统计单词数，避免为无意义的数字切分整篇文档
+            if _is_mostly_cjk(content):
+                word_line = ""
+            else:
+                word_line = f"单词数: {len(content.split()):,}\n"
             
             info_text = (
-                f"文件名: {os.path.basename(filepath)}\n"
+                f"文件名: {name}\n"
                 f"大小: {size_str}\n"
                 f"字符数: {char_count:,}\n"
-                f"单词数: {word_count:,}\n"
+                f"{word_line}"
                 f"行数: {line_count:,}\n\n"
                 f"内容预览:\n{content[:200]}{'...' if len(content) > 200 else ''}"
             )
+        else:
+            # 大文件不整体解码：分块统计行数，只解码开头部分用于预览
+            line_count, head = self._stream_file_stats(filepath)
             
-            self.file_info_text.configure(state="normal")
-            self.file_info_text.delete("0.0", "end")
-            self.file_info_text.insert("0.0", info_text)
-            self.file_info_text.configure(state="disabled")
-            
-        except Exception as e:
-            self.log_message(f"❌ 读取文件信息失败: {str(e)}", is_error=True)
+            info_text = (
+                f"文件名: {name}\n"
+                f"大小: {size_str}\n"
+                f"字符数/单词数: 大文件，已跳过统计\n"
+                f"行数: {line_count:,}\n\n"
+                f"内容预览:\n{head[:200]}..."
+            )
+        
+        return info_text
+    
+    def _render_file_info(self, info_text):
+        """在文件信息框中显示信息文本（仅在主线程调用）"""
+        self._set_readonly_text(self.file_info_text, info_text)
+    
+    @staticmethod
+    def _set_readonly_text(widget, text):
+        """替换只读文本框的内容，直接切换底层tk Text的状态，避免CTk重新计算样式"""
+        textbox = widget._textbox
+        textbox.configure(state="normal")
+        textbox.delete("1.0", "end")
+        textbox.insert("1.0", text)
+        textbox.configure(state="disabled")
     
     def import_to_vectorstore(self):
         """导入文件到向量库"""
-        if not hasattr(self, 'selected_file_path'):
+        if not getattr(self, 'selected_file_paths', None):
             messagebox.showwarning("警告", "请先选择文件")
             return
         
@@ -403,34 +840,63 @@ class KnowledgeTab:
                 'model_name': self.main_window.embedding_model_name_var.get().strip()
             }
             
-            filepath = self.main_window.filepath_var.get().strip()
+            filepath = self._get_kb_dir()
             
             if not all([embedding_config['api_key'], embedding_config['url'], 
                        embedding_config['model_name'], filepath]):
                 messagebox.showwarning("配置错误", "请先在配置页面设置Embedding相关配置和保存路径")
                 return
             
+            try:
+                batch_size = max(1, int(self.embed_batch_size_var.get().strip()))
+            except ValueError:
+                batch_size = 100
+            try:
+                concurrency = max(1, int(self.embed_concurrency_var.get().strip()))
+            except ValueError:
+                concurrency = 4
+            try:
+                chunk_size = int(self.chunk_size_var.get().strip())
+                chunk_overlap = int(self.chunk_overlap_var.get().strip())
+            except ValueError:
+                messagebox.showwarning("配置错误", "分段长度和重叠长度必须是整数")
+                return
+            if chunk_size <= 0 or not 0 <= chunk_overlap <= max_chunk_overlap(chunk_size):
+                messagebox.showwarning("配置错误", "分段长度必须大于0，重叠长度必须不小于0且不超过分段长度的一半")
+                return
+            
+            file_paths = list(self.selected_file_paths)
+            
             # 在后台线程中执行导入
             def import_task():
                 try:
-                    self.log_message("🚀 开始导入到向量库...")
+                    self.main_window.master.after(0, lambda: self.log_message(
+                        f"🚀 开始导入到向量库: {len(file_paths)} 个文件, 每批 {batch_size} 段, 并发 {concurrency}..."))
                     
-                    from novel_generator import import_knowledge_file
+                    from novel_generator import import_knowledge_files_batch
                     
-                    import_knowledge_file(
+                    imported = import_knowledge_files_batch(
                         embedding_api_key=embedding_config['api_key'],
                         embedding_url=embedding_config['url'],
                         embedding_interface_format=embedding_config['interface_format'],
                         embedding_model_name=embedding_config['model_name'],
-                        file_path=self.selected_file_path,
-                        filepath=filepath
+                        file_paths=file_paths,
+                        filepath=filepath,
+                        batch_size=batch_size,
+                        max_concurrency=concurrency,
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap
                     )
                     
-                    self.main_window.master.after(0, lambda: self.log_message("✅ 向量库导入完成"))
+                    if imported:
+                        done_msg = f"✅ 向量库导入完成，共写入 {imported} 个段落"
+                    else:
+                        done_msg = "✅ 没有需要导入的新内容（文件未修改、为空或导入失败，详见日志）"
+                    self.main_window.master.after(0, lambda: self.log_message(done_msg))
                     
                 except Exception as e:
                     error_msg = f"❌ 向量库导入失败: {str(e)}"
-                    self.main_window.after(0, lambda: self.log_message(error_msg, is_error=True))
+                    self.main_window.master.after(0, lambda: self.log_message(error_msg, is_error=True))
             
             Thread(target=import_task, daemon=True).start()
             
@@ -447,41 +913,47 @@ class KnowledgeTab:
         
         # 简单的文本解析预览
         try:
-            content = read_file(self.selected_file_path)
-            self.show_simple_preview(content)
+            lines = self._get_lines(self.selected_file_path)
+            self.show_simple_preview(lines)
             self.log_message("✅ 简化解析完成，查看右侧预览结果")
             
         except Exception as e:
             self.log_message(f"❌ 解析失败: {str(e)}", is_error=True)
     
-    def show_simple_preview(self, content):
-        """显示简单的内容预览"""
-        # 简单的关键词提取预览
-        lines = content.split('\n')
-        
-        # 模拟世界观提取（查找包含地名、设定等关键词的行）
-        worldview_lines = [line for line in lines if any(kw in line for kw in ['世界', '地理', '历史', '科技', '魔法', '设定'])]
-        worldview_preview = '\n'.join(worldview_lines[:10]) or "未找到明显的世界观信息"
-        
-        # 模拟角色提取
-        character_lines = [line for line in lines if any(kw in line for kw in ['角色', '人物', '主角', '配角', '性格'])]
-        character_preview = '\n'.join(character_lines[:10]) or "未找到明显的角色信息"
-        
-        # 模拟剧情提取  
-        plot_lines = [line for line in lines if any(kw in line for kw in ['剧情', '故事', '情节', '冲突', '高潮'])]
-        plot_preview = '\n'.join(plot_lines[:10]) or "未找到明显的剧情信息"
+    def show_simple_preview(self, lines):
+        """显示简单的内容预览（lines为按行切分后的文件内容）"""
+        # 简单的关键词提取预览：一次遍历完成三类分类，每类只保留前10行用于展示
+        worldview_lines, character_lines, plot_lines = [], [], []
+        worldview_count = character_count = plot_count = 0
+        
+        for line in lines:
+            # 模拟世界观提取（查找包含地名、设定等关键词的行）
+            if WORLDVIEW_PATTERN.search(line):
+                worldview_count += 1
+                if worldview_count <= PREVIEW_LINE_LIMIT:
+                    worldview_lines.append(line)
+            # 模拟角色提取
+            if CHARACTER_PATTERN.search(line):
+                character_count += 1
+                if character_count <= PREVIEW_LINE_LIMIT:
+                    character_lines.append(line)
+            # 模拟剧情提取
+            if PLOT_PATTERN.search(line):
+                plot_count += 1
+                if plot_count <= PREVIEW_LINE_LIMIT:
+                    plot_lines.append(line)
         
         # 更新预览
-        self.update_preview("世界观", worldview_preview)
-        self.update_preview("角色", character_preview)
-        self.update_preview("剧情", plot_preview)
+        self.update_preview("世界观", '\n'.join(worldview_lines) or "未找到明显的世界观信息")
+        self.update_preview("角色", '\n'.join(character_lines) or "未找到明显的角色信息")
+        self.update_preview("剧情", '\n'.join(plot_lines) or "未找到明显的剧情信息")
         self.update_preview("关系", "简化解析不支持关系分析")
         
         # 更新统计
         self.update_stats_display({
-            "worldview_elements": len(worldview_lines),
-            "character_count": len(character_lines),
-            "plot_points": len(plot_lines)
+            "worldview_elements": worldview_count,
+            "character_count": character_count,
+            "plot_points": plot_count
         })
     
     def start_parsing(self):
@@ -499,7 +971,7 @@ class KnowledgeTab:
                 'model_name': self.main_window.model_name_var.get().strip()
             }
             
-            filepath = self.main_window.filepath_var.get().strip()
+            filepath = self._get_kb_dir()
             
             if not all([llm_config['api_key'], llm_config['base_url'], 
                        llm_config['model_name'], filepath]):
@@ -512,6 +984,10 @@ class KnowledgeTab:
             self.progress_bar.set(0)
             self.progress_label.configure(text="准备解析...")
             
+            # 每次解析使用独立的取消事件，避免影响仍在收尾的上一次任务
+            cancel_event = Event()
+            self._cancel_event = cancel_event
+            
             # 在后台线程中执行解析
             def parsing_task():
                 try:
@@ -525,16 +1001,26 @@ class KnowledgeTab:
                         llm_api_key=llm_config['api_key'],
                         llm_base_url=llm_config['base_url'],
                         llm_model=llm_config['model_name'],
-                        filepath=filepath
+                        filepath=filepath,
+                        cancel_event=cancel_event
                     )
                     
                     if structured_data:
                         self.current_structured_knowledge = structured_data
                         self.main_window.master.after(0, self.on_parsing_success)
+                        # 解析结果已由解析器保存为JSON，同步生成msgpack缓存
+                        _write_kb_binary_cache(
+                            structured_data,
+                            os.path.join(filepath, KB_JSON_FILE),
+                            os.path.join(filepath, KB_MSGPACK_FILE),
+                            os.path.join(filepath, KB_HASH_FILE)
+                        )
                     else:
                         self.main_window.master.after(0, lambda: self.log_message("❌ 解析失败，未获取到有效数据", is_error=True))
                         self.main_window.master.after(0, self.on_parsing_complete)
                     
+                except ParsingCancelledError:
+                    self.main_window.master.after(0, lambda: self.log_message("⏹️ 解析已停止"))
                 except Exception as e:
                     error_msg = f"❌ 解析过程出错: {str(e)}"
                     self.main_window.master.after(0, lambda: self.log_message(error_msg, is_error=True))
@@ -546,8 +1032,19 @@ class KnowledgeTab:
             self.log_message(f"❌ 启动解析失败: {str(e)}", is_error=True)
             self.on_parsing_complete()
     
+    def _serialize_knowledge(self):
+        """序列化当前解析结果，同一结果对象只编码一次"""
+        knowledge = self.current_structured_knowledge
+        if self._ser_cache is not None and self._ser_cache[0] is knowledge:
+            return self._ser_cache[1]
+        
+        data = _serialize_json(knowledge)
+        self._ser_cache = (knowledge, data)
+        return data
+    
     def on_parsing_success(self):
         """解析成功回调"""
+        self._ser_cache = None
         self.progress_bar.set(1.0)
         self.progress_label.configure(text="解析完成 ✅")
         self.log_message("✅ 智能解析完成！")
@@ -567,141 +1064,220 @@ class KnowledgeTab:
         self.stop_parse_btn.configure(state="disabled")
     
     def stop_parsing(self):
-        """停止解析"""
-        # 注意：实际的停止功能需要更复杂的线程管理
+        """停止解析（解析线程在下一个段落/合并边界处退出）"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
         self.log_message("⏹️ 用户请求停止解析")
         self.on_parsing_complete()
     
     def display_parsing_results(self):
         """显示解析结果"""
+        self._ser_cache = None
         if not self.current_structured_knowledge:
             return
         
         data = self.current_structured_knowledge
         
-        # 显示世界观
-        worldview_text = self.format_worldview_display(data.get("worldview", {}))
-        self.update_preview("世界观", worldview_text)
-        
-        # 显示角色
-        characters_text = self.format_characters_display(data.get("characters", []))
-        self.update_preview("角色", characters_text)
+        # 只格式化当前可见的选项卡，其余选项卡在切换到时再格式化
+        self._pending_renders = {
+            "世界观": lambda: self.format_worldview_display(data.get("worldview", {})),
+            "角色": lambda: self.format_characters_display(data.get("characters", [])),
+            "剧情": lambda: self.format_plot_display(data.get("plot_outline", {})),
+            "关系": lambda: self.format_relationships_display(data.get("relationship_network", {}))
+        }
+        self._display_chunks(self._iter_display_steps(data))
+    
+    def _iter_display_steps(self, data):
+        """逐步显示解析结果，每个yield处把控制权交还给事件循环"""
+        # 先显示当前可见的选项卡
+        self._flush_pending_render(self.preview_tabview.get())
+        yield
         
-        # 显示剧情
-        plot_text = self.format_plot_display(data.get("plot_outline", {}))
-        self.update_preview("剧情", plot_text)
+        # 更新统计信息
+        self.update_stats_display(data.get("statistics", {}))
+    
+    def _display_chunks(self, iterator, batch=1):
+        """通过after分批执行显示步骤，每批执行batch步，期间界面保持可响应"""
+        self._cancel_render()
         
-        # 显示关系
-        relationships_text = self.format_relationships_display(data.get("relationship_network", {}))
-        self.update_preview("关系", relationships_text)
+        def next_chunk():
+            self._render_token = None
+            for _ in range(batch):
+                try:
+                    next(iterator)
+                except StopIteration:
+                    return
+            self._render_token = self.main_window.master.after(1, next_chunk)
         
-        # 更新统计信息
-        stats = data.get("statistics", {})
-        self.update_stats_display(stats)
+        self._render_token = self.main_window.master.after(0, next_chunk)
+    
+    def _cancel_render(self):
+        """取消尚未完成的分批显示"""
+        if self._render_token is not None:
+            self.main_window.master.after_cancel(self._render_token)
+            self._render_token = None
     
     def format_worldview_display(self, worldview_data):
         """格式化世界观显示"""
         if not worldview_data:
             return "暂无世界观数据"
         
-        lines = []
+        buf = io.StringIO()
         if worldview_data.get("name"):
-            lines.append(f"📍 {worldview_data['name']}")
+            buf.write(f"📍 {worldview_data['name']}\n")
         
         if worldview_data.get("overview"):
-            lines.append(f"\n概述: {worldview_data['overview']}")
+            buf.write(f"\n概述: {worldview_data['overview']}\n")
         
         categories = ["geography", "history", "technology", "society", "culture", "magic_system"]
         category_names = ["地理", "历史", "科技", "社会", "文化", "魔法体系"]
         
         for cat, name in zip(categories, category_names):
-            if cat in worldview_data and worldview_data[cat]:
-                lines.append(f"\n== {name} ==")
+            if worldview_data.get(cat):
+                buf.write(f"\n== {name} ==\n")
                 for item in worldview_data[cat][:3]:  # 只显示前3个
-                    lines.append(f"• {item.get('name', '')}: {item.get('description', '')[:100]}...")
+                    buf.write(f"• {item.get('name', '')}: {_trunc(item.get('description', ''), 100)}\n")
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def format_characters_display(self, characters_data):
         """格式化角色显示"""
         if not characters_data:
             return "暂无角色数据"
         
-        lines = []
+        buf = io.StringIO()
         for char in characters_data[:5]:  # 只显示前5个角色
             name = char.get("name", "未知角色")
             role = char.get("role", "")
-            lines.append(f"👤 {name} ({role})")
+            buf.write(f"👤 {name} ({role})\n")
             
             if char.get("background"):
-                lines.append(f"   背景: {char['background'][:100]}...")
+                buf.write(f"   背景: {_trunc(char['background'], 100)}\n")
             
             if char.get("personality"):
                 personalities = ", ".join(char["personality"][:3])
-                lines.append(f"   性格: {personalities}")
+                buf.write(f"   性格: {personalities}\n")
             
-            lines.append("")
+            buf.write("\n")
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def format_plot_display(self, plot_data):
         """格式化剧情显示"""
         if not plot_data:
             return "暂无剧情数据"
         
-        lines = []
+        buf = io.StringIO()
         if plot_data.get("title"):
-            lines.append(f"📖 {plot_data['title']}")
+            buf.write(f"📖 {plot_data['title']}\n")
         
         if plot_data.get("theme"):
-            lines.append(f"主题: {plot_data['theme']}")
+            buf.write(f"主题: {plot_data['theme']}\n")
         
         if plot_data.get("main_storyline"):
-            lines.append(f"主线: {plot_data['main_storyline']}")
+            buf.write(f"主线: {plot_data['main_storyline']}\n")
         
         if plot_data.get("major_conflicts"):
-            lines.append("\n== 主要冲突 ==")
+            buf.write("\n== 主要冲突 ==\n")
             for conflict in plot_data["major_conflicts"][:3]:
                 name = conflict.get("name", "")
                 desc = conflict.get("description", "")
-                lines.append(f"• {name}: {desc[:100]}...")
+                buf.write(f"• {name}: {_trunc(desc, 100)}\n")
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def format_relationships_display(self, relationships_data):
         """格式化关系显示"""
         if not relationships_data:
             return "暂无关系数据"
         
-        lines = []
         characters = relationships_data.get("characters", [])
         relationships = relationships_data.get("relationships", [])
         
-        lines.append(f"角色总数: {len(characters)}")
-        lines.append(f"关系总数: {len(relationships)}")
-        lines.append("\n== 主要关系 ==")
+        buf = io.StringIO()
+        buf.write(f"角色总数: {len(characters)}\n")
+        buf.write(f"关系总数: {len(relationships)}\n")
+        buf.write("\n== 主要关系 ==\n")
         
         for rel in relationships[:5]:  # 只显示前5个关系
             char1 = rel.get("character1", "")
             char2 = rel.get("character2", "")
             rel_type = rel.get("relationship_type", "")
-            lines.append(f"• {char1} ↔ {char2}: {rel_type}")
+            buf.write(f"• {char1} ↔ {char2}: {rel_type}\n")
         
-        return "\n".join(lines)
+        return buf.getvalue()
+    
+    def _ensure_preview(self, tab_name):
+        """获取选项卡的预览文本框，首次使用时才创建"""
+        widget = self._preview_widgets.get(tab_name)
+        if widget is None and tab_name in PREVIEW_TABS:
+            widget = ctk.CTkTextbox(self.preview_tabview.tab(tab_name), height=200, state="disabled")
+            widget.pack(fill="both", expand=True, padx=5, pady=5)
+            self._preview_widgets[tab_name] = widget
+            
+            self._preview_state.pop(tab_name, None)
+            self._render_text(widget, tab_name, PREVIEW_PLACEHOLDER)
+        return widget
+    
+    def _on_preview_tab_changed(self):
+        """预览选项卡切换回调"""
+        tab_name = self.preview_tabview.get()
+        self._ensure_preview(tab_name)
+        self._flush_pending_render(tab_name)
+    
+    def _flush_pending_render(self, tab_name):
+        """格式化并显示选项卡中尚未渲染的解析结果"""
+        render = self._pending_renders.pop(tab_name, None)
+        if render is not None:
+            self.update_preview(tab_name, render())
     
     def update_preview(self, tab_name, content):
         """更新预览内容"""
-        preview_widgets = {
-            "世界观": self.worldview_preview,
-            "角色": self.characters_preview,
-            "剧情": self.plot_preview,
-            "关系": self.relationships_preview
-        }
-        
-        widget = preview_widgets.get(tab_name)
+        # 直接更新的内容覆盖尚未渲染的旧结果
+        self._pending_renders.pop(tab_name, None)
+        widget = self._ensure_preview(tab_name)
         if widget:
+            self._render_text(widget, tab_name, content)
+    
+    def _render_text(self, widget, key, content):
+        """增量更新只读文本框：内容未变化时跳过，否则只重写与上次不同的尾部行
+
+        文本框保持disabled状态，用户无法编辑，记录的内容始终与显示一致
+        """
+        previous = self._preview_state.get(key)
+        if previous == content:
+            return
+        
+        widget = widget._textbox
+        widget.configure(state="normal")
+        if previous is None:
             widget.delete("0.0", "end")
             widget.insert("0.0", content)
+        else:
+            # 按行比较公共前缀（行号索引不受表情等字符的宽度影响）
+            old_lines = previous.split('\n')
+            new_lines = content.split('\n')
+            common = 0
+            for old_line, new_line in zip(old_lines, new_lines):
+                if old_line != new_line:
+                    break
+                common += 1
+            
+            if common == 0:
+                widget.delete("0.0", "end")
+                widget.insert("0.0", content)
+            elif common == len(new_lines):
+                # 新内容是旧内容的前几行，只需删除多余部分
+                widget.delete(f"{common}.end", "end")
+            elif common == len(old_lines):
+                # 旧内容是新内容的前几行，只需追加新增部分
+                widget.insert("end", '\n' + '\n'.join(new_lines[common:]))
+            else:
+                widget.delete(f"{common + 1}.0", "end")
+                widget.insert("end", '\n'.join(new_lines[common:]))
+        
+        widget.configure(state="disabled")
+        self._preview_state[key] = content
     
     def update_stats_display(self, stats=None):
         """更新统计信息显示"""
@@ -715,33 +1291,52 @@ class KnowledgeTab:
             stats_lines.append(f"关系数量: {stats.get('relationship_count', 0)}")
             stats_text = "\n".join(stats_lines)
         
-        self.stats_text.delete("0.0", "end")
-        self.stats_text.insert("0.0", stats_text)
+        self._render_text(self.stats_text, "统计", stats_text)
     
     def clear_previews(self):
         """清空所有预览"""
-        previews = [self.worldview_preview, self.characters_preview, 
-                   self.plot_preview, self.relationships_preview]
-        
-        for preview in previews:
-            preview.delete("0.0", "end")
-            preview.insert("0.0", "暂无数据...")
+        # 尚未创建的预览框在首次创建时即显示占位文本
+        self._cancel_render()
+        self._pending_renders.clear()
+        for tab_name in self._preview_widgets:
+            self.update_preview(tab_name, PREVIEW_PLACEHOLDER)
     
     def log_message(self, message, is_error=False):
         """记录日志消息"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        timestamp = time.strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
         
-        self.log_text.insert("end", log_entry)
-        self.log_text.see("end")
+        # 先放入队列，由定时任务合并写入，避免每条日志都触发一次重绘
+        self._log_queue.append(log_entry)
+        if self._log_flush_job is None:
+            self._log_flush_job = self.main_window.master.after(LOG_FLUSH_INTERVAL_MS, self._flush_log)
         
         # 如果是错误消息，可以在这里添加特殊处理
         if is_error:
             print(f"ERROR: {message}")  # 也输出到控制台
     
+    def _flush_log(self):
+        """将队列中的日志一次性写入日志框，并只保留最近的日志行"""
+        self._log_flush_job = None
+        if not self._log_queue:
+            return
+        
+        pending = "".join(self._log_queue)
+        # 缓冲区已满说明新日志足以填满整个日志框，直接整体替换，无需先插入再截断
+        replace_all = len(self._log_queue) >= LOG_MAX_LINES
+        self._log_queue.clear()
+        
+        if replace_all:
+            self.log_text.delete("0.0", "end")
+            self.log_text.insert("end", pending)
+        else:
+            self.log_text.insert("end", pending)
+            self.log_text.delete("1.0", f"end-{LOG_MAX_LINES}l")
+        self.log_text.see("end")
+    
     def clear_log(self):
         """清空日志"""
+        self._log_queue.clear()
         self.log_text.delete("0.0", "end")
     
     def save_parsing_results(self):
@@ -751,15 +1346,14 @@ class KnowledgeTab:
             return
         
         try:
-            filepath = self.main_window.filepath_var.get().strip()
+            filepath = self._get_kb_dir()
             if not filepath:
                 messagebox.showwarning("警告", "请先设置保存路径")
                 return
             
             # 保存为JSON文件
-            output_file = os.path.join(filepath, "knowledge_parsing_results.json")
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_structured_knowledge, f, ensure_ascii=False, indent=2)
+            output_file = self._get_kb_path("knowledge_parsing_results.json")
+            _atomic_write_bytes(self._serialize_knowledge(), output_file)
             
             self.log_message(f"✅ 解析结果已保存至: {output_file}")
             messagebox.showinfo("成功", f"解析结果已保存至:\n{output_file}")
@@ -781,14 +1375,21 @@ class KnowledgeTab:
         
         try:
             # 确保解析结果已保存为extracted_knowledge.json（架构生成时会自动加载这个文件）
-            filepath = self.main_window.filepath_var.get().strip()
+            filepath = self._get_kb_dir()
             if not filepath:
                 messagebox.showwarning("警告", "请先设置保存路径")
                 return
             
-            output_file = os.path.join(filepath, "extracted_knowledge.json")
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_structured_knowledge, f, ensure_ascii=False, indent=2)
+            output_file = self._get_kb_path(KB_JSON_FILE)
+            data = self._serialize_knowledge()
+            _atomic_write_bytes(data, output_file)
+            # 在后台保存校验文件与msgpack缓存，下次加载（包括重启后）可跳过JSON解析
+            Thread(
+                target=_write_kb_binary_cache,
+                args=(self.current_structured_knowledge, output_file,
+                      self._get_kb_path(KB_MSGPACK_FILE), self._get_kb_path(KB_HASH_FILE), data),
+                daemon=True
+            ).start()
             
             self.log_message(f"✅ 知识库数据已准备用于架构生成: {output_file}")
             messagebox.showinfo("设置成功", 
@@ -802,66 +1403,192 @@ class KnowledgeTab:
             self.log_message(error_msg, is_error=True)
             messagebox.showerror("错误", error_msg)
     
+    def _run_async(self, fn, on_done, on_error=None):
+        """在后台线程执行fn，完成后在主线程以结果调用on_done（出错时调用on_error）"""
+        def task():
+            try:
+                result = fn()
+            except Exception as e:
+                if on_error is not None:
+                    self.main_window.master.after(0, lambda err=e: on_error(err))
+                return
+            self.main_window.master.after(0, lambda: on_done(result))
+        
+        Thread(target=task, daemon=True).start()
+    
+    def _apply_ui_ops(self, ops):
+        """将一组界面更新合并到一次after_idle回调中执行，减少重复重绘"""
+        def run():
+            for op in ops:
+                op()
+        
+        self.main_window.master.after_idle(run)
+    
     def load_existing_knowledge(self):
-        """加载已有的知识库"""
-        filepath = self.main_window.filepath_var.get().strip()
+        """加载已有的知识库（文件读取与解析在后台线程进行）"""
+        filepath = self._get_kb_dir()
         if not filepath:
             messagebox.showwarning("警告", "请先设置保存路径")
             return
         
-        knowledge_file = os.path.join(filepath, "extracted_knowledge.json")
-        if not os.path.exists(knowledge_file):
-            messagebox.showinfo("提示", "未找到已有的知识库文件")
-            return
+        # 停止上一次尚未完成的分批显示，避免旧数据覆盖新数据
+        self._cancel_render()
         
-        try:
-            with open(knowledge_file, 'r', encoding='utf-8') as f:
-                self.current_structured_knowledge = json.load(f)
-            
-            self.display_parsing_results()
-            self.save_results_btn.configure(state="normal")
-            self.use_for_generation_btn.configure(state="normal")
+        knowledge_file = self._get_kb_path(KB_JSON_FILE)
+        cache_file = self._get_kb_path(KB_MSGPACK_FILE)
+        hash_file = self._get_kb_path(KB_HASH_FILE)
+        
+        def load():
+            try:
+                st = os.stat(knowledge_file)
+            except FileNotFoundError:
+                return None
             
-            self.log_message("✅ 已加载现有知识库数据")
+            # 文件未变化时直接复用上次解析的结果
+            key = (knowledge_file, st.st_mtime_ns, st.st_size)
+            data = self._kb_cache.get(key)
+            if data is None:
+                # 内容与上次保存时一致则直接读取msgpack缓存（跨重启有效），否则解析JSON
+                data = _load_kb_binary_cache(knowledge_file, cache_file, hash_file, st.st_mtime_ns)
+                if data is None:
+                    data = _load_json_file(knowledge_file, st.st_size)
+                # 超大知识库不放入缓存，避免多份完整对象树同时驻留内存
+                if st.st_size <= KB_CACHE_MAX_FILE_SIZE:
+                    self._kb_cache[key] = data
+                # 先进先出淘汰，限制缓存占用的内存
+                while len(self._kb_cache) > KB_CACHE_SIZE:
+                    self._kb_cache.pop(next(iter(self._kb_cache)))
+            return data
+        
+        def on_done(data):
+            if data is None:
+                messagebox.showinfo("提示", "未找到已有的知识库文件")
+                return
             
-        except Exception as e:
+            # 只在主线程中替换当前数据
+            self.current_structured_knowledge = data
+            self._apply_ui_ops([
+                self.display_parsing_results,
+                lambda: self.save_results_btn.configure(state="normal"),
+                lambda: self.use_for_generation_btn.configure(state="normal"),
+                lambda: self.log_message("✅ 已加载现有知识库数据"),
+            ])
+        
+        def on_error(e):
             error_msg = f"❌ 加载失败: {str(e)}"
-            self.log_message(error_msg, is_error=True)
-            messagebox.showerror("错误", error_msg)
+            self._apply_ui_ops([
+                lambda: self.log_message(error_msg, is_error=True),
+                lambda: messagebox.showerror("错误", error_msg),
+            ])
+        
+        self._run_async(load, on_done, on_error)
     
     def clear_knowledge_base(self):
-        """清空知识库"""
-        if not messagebox.askyesno("确认", "确定要清空所有知识库数据吗？\n此操作不可撤销！"):
+        """清空知识库（非模态确认，等待确认期间在后台预先扫描待删除的文件）"""
+        if self._confirm_dialog is not None and self._confirm_dialog.exists():
+            self._confirm_dialog.focus()
             return
         
-        try:
-            filepath = self.main_window.filepath_var.get().strip()
-            if filepath:
-                # 清空相关文件
-                files_to_clear = [
-                    "extracted_knowledge.json",
-                    "knowledge_parsing_results.json"
-                ]
-                
-                for filename in files_to_clear:
-                    file_path = os.path.join(filepath, filename)
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        self.log_message(f"🗑️ 已删除: {filename}")
+        filepath = self._get_kb_dir()
+        scan = {}
+        scanned = Event()
+        
+        def prefetch():
+            try:
+                scan['entries'], scan['leftovers'] = _scan_knowledge_files(filepath) if filepath else ([], [])
+            except Exception as e:
+                scan['error'] = e
+            finally:
+                scanned.set()
+        
+        Thread(target=prefetch, daemon=True).start()
+        
+        def clear_files():
+            scanned.wait()
+            if 'error' in scan:
+                raise scan['error']
             
+            # 将相关文件改名为临时名称（原子操作，几乎不耗时），实际删除交给后台删除线程
+            deleted = []
+            trashed = []
+            for name, path in scan['entries']:
+                trash_path = f"{path}{TRASH_MARKER}{os.getpid()}-{time.time_ns()}"
+                try:
+                    os.replace(path, trash_path)
+                except FileNotFoundError:
+                    continue
+                deleted.append(name)
+                trashed.append(trash_path)
+            # 顺带删除以前未能删除的遗留文件（程序提前退出或删除失败）
+            self._enqueue_trash(trashed + scan['leftovers'])
+            return deleted
+        
+        def on_done(deleted):
             # 清空当前数据
             self.current_structured_knowledge = None
-            self.clear_previews()
-            self.update_stats_display()
-            
-            # 禁用相关按钮
-            self.save_results_btn.configure(state="disabled")
-            self.use_for_generation_btn.configure(state="disabled")
-            
-            self.log_message("✅ 知识库已清空")
-            messagebox.showinfo("完成", "知识库已清空")
             
-        except Exception as e:
+            ops = []
+            if deleted:
+                # 合并为一条日志，减少文本控件插入次数
+                ops.append(lambda: self.log_message(f"🗑️ 已删除: {', '.join(deleted)}"))
+            ops.extend([
+                self.clear_previews,
+                self.update_stats_display,
+                # 禁用相关按钮
+                lambda: self.save_results_btn.configure(state="disabled"),
+                lambda: self.use_for_generation_btn.configure(state="disabled"),
+                lambda: self.log_message("✅ 知识库已清空"),
+                lambda: messagebox.showinfo("完成", "知识库已清空"),
+            ])
+            self._apply_ui_ops(ops)
+        
+        def on_error(e):
             error_msg = f"❌ 清空失败: {str(e)}"
-            self.log_message(error_msg, is_error=True)
-            messagebox.showerror("错误", error_msg)
\ No newline at end of file
+            self._apply_ui_ops([
+                lambda: self.log_message(error_msg, is_error=True),
+                lambda: messagebox.showerror("错误", error_msg),
+            ])
+        
+        def on_yes():
+            self._confirm_dialog = None
+            self._run_async(clear_files, on_done, on_error)
+        
+        def on_no():
+            self._confirm_dialog = None
+        
+        self._confirm_dialog = ConfirmDialog(
+            self.main_window.master, "确认", "确定要清空所有知识库数据吗？\n此操作不可撤销！",
+            on_yes, on_no
+        )
+    
+    def _sweep_trash(self):
+        """在后台清理上次运行遗留的待删除文件"""
+        filepath = self._get_kb_dir()
+        if not filepath:
+            return
+        
+        def sweep():
+            return _scan_knowledge_files(filepath)[1]
+        
+        self._run_async(sweep, self._enqueue_trash)
+    
+    def _enqueue_trash(self, paths):
+        """将已改名的文件交给后台删除线程（按需启动）"""
+        if not paths:
+            return
+        for path in paths:
+            self._trash_queue.put(path)
+        if self._trash_worker is None or not self._trash_worker.is_alive():
+            self._trash_worker = Thread(target=self._trash_worker_loop, daemon=True)
+            self._trash_worker.start()
+    
+    def _trash_worker_loop(self):
+        """后台删除线程：依次删除队列中的文件"""
+        while True:
+            path = self._trash_queue.get()
+            try:
+                with suppress(FileNotFoundError):
+                    os.unlink(path)
+            except OSError as e:
+                error_msg = f"❌ 删除文件失败: {os.path.basename(path)} ({e})"
+                self.main_window.master.after(0, lambda msg=error_msg: self.log_message(msg, is_error=True))